@@ -0,0 +1,159 @@
+import random
+
+import scalarmult
+import encoding
+
+# The parts of a twisted Edwards curve a x^2 + y^2 = 1 + d x^2 y^2 that don't
+# depend on the coordinates its arithmetic uses: the validation policy, the
+# point encodings and multi-scalar multiplication. The curve classes of
+# edwards.py, edwards_proj.py and edwards_ext.py derive from it and set
+#    Point, the affine point class of their module,
+#    Ideal, the identity of their module, and
+#    Coordinates, the class of points in the coordinates their arithmetic
+#    runs in (None for affine curves), with lift() converting to it.
+class EdwardsCurve(object):
+   Point = None
+   Ideal = None
+   Coordinates = None
+
+   # validation is the policy for checking that points are on the curve:
+   #    'eager' checks points built from outside input in the constructor,
+   #    'lazy' queues them up for a single validate_batch() call, and
+   #    'debug' also checks every intermediate result of the arithmetic,
+   #    which is otherwise trusted to be on the curve
+   def __init__(self, a, d, validation='eager'):
+      if validation not in ('eager', 'lazy', 'debug'):
+         raise ValueError("Unknown validation policy %r" % validation)
+
+      self.a = a
+      self.d = d
+      self.validation = validation
+      self.pending = []
+
+      self.disc = a * d * (a - d) * (a - d) * (a - d) * (a - d)
+      self.j = 16 * (a * a + 14 * a * d + d * d) * (a * a + 14 * a * d + d * d) * \
+               (a * a + 14 * a * d + d * d) / self.disc
+      if not self.isSmooth():
+         raise Exception("The curve %s is not smooth!" % self)
+
+
+   def isSmooth(self):
+      return self.disc != 0
+
+
+   def testPoint(self, x, y):
+      return self.a * x * x + y*y == 1 + self.d * x * x * y * y
+
+
+   # validate_batch: [Point] -> None
+   # check that all the given points (by default, those queued up by the
+   # 'lazy' policy) are on the curve with one randomized test: for random
+   # 128-bit r_i, sum r_i (a x_i^2 + y_i^2 - 1 - d x_i^2 y_i^2) vanishes for
+   # points off the curve with probability about 2^-128. On failure, the
+   # points are checked one at a time to report the bad ones.
+   def validate_batch(self, points=None):
+      if points is None:
+         points, self.pending = self.pending, []
+
+      rng = random.SystemRandom()
+      sumR, sumX, sumY, sumXY = 0, 0, 0, 0
+      for P in points:
+         r = rng.getrandbits(128)
+         xx, yy = P.x * P.x, P.y * P.y
+         sumR += r
+         sumX += r * xx
+         sumY += r * yy
+         sumXY += r * (xx * yy)
+
+      if self.a * sumX + sumY != sumR + self.d * sumXY:
+         bad = [P for P in points if not self.testPoint(P.x, P.y)]
+         raise Exception("The points %s are not on the given curve %s!" % (bad, self))
+
+
+   def __repr__(self):
+      return str(self)
+
+
+   def __eq__(self, other):
+      return (self.a, self.d) == (other.a, other.d)
+
+
+   # lift: point -> point in Coordinates
+   def lift(self, P):
+      return P
+
+
+   # affinePoints: [point] -> [Point]
+   # the given points as affine Points for the encodings: the identity as
+   # (0, 1), and points in the curve's own coordinates normalized together
+   # with a single inversion
+   def affinePoints(self, points):
+      points = list(points)
+      if self.Coordinates is not None:
+         indices = [i for (i, P) in enumerate(points) if isinstance(P, self.Coordinates)]
+         if indices:
+            normalized = self.normalize_batch([points[i] for i in indices])
+            for (i, P) in zip(indices, normalized):
+               points[i] = P
+
+      return [self.Point(self, 0, 1, True) if isinstance(P, self.Ideal) else P for P in points]
+
+
+   # compress: Point -> bytes
+   # the 32-byte encoding of y with the sign of x in the top bit (the layout
+   # Zcash uses for Jubjub points)
+   def compress(self, P):
+      return encoding.compress(self.affinePoints([P])[0])
+
+
+   def decompress(self, buf):
+      return self.decompress_batch([buf])[0]
+
+
+   # decompress_batch: [bytes] -> [Point]
+   # decode many points at once, sharing one inversion between them
+   def decompress_batch(self, buffers):
+      return encoding.decompress_batch(self, buffers, self.Point)
+
+
+   # encode_into: [Point], buffer -> int
+   # write the points as fixed-width records (see encoding.py) into a
+   # preallocated bytearray, memoryview or mmap, returning the end offset
+   def encode_into(self, points, buf, offset=0, compressed=False):
+      return encoding.encode_into(self.affinePoints(points), buf, offset, compressed)
+
+
+   # decode_from: buffer -> [Point]
+   # read count records (by default, all of them) from a bytes-like object
+   # or mmap without copying them out first
+   def decode_from(self, buf, offset=0, count=None, compressed=False):
+      return encoding.decode_from(self, buf, self.Point, offset, count, compressed)
+
+
+   def save(self, points, path, compressed=False):
+      encoding.save(self.affinePoints(points), path, compressed)
+
+
+   def load(self, path, compressed=False):
+      return encoding.load(self, path, self.Point, compressed)
+
+
+   # multi_scalar_mul: [int], [Point] -> Point
+   # sum(k_i P_i) by Pippenger's bucket method (see scalarmult.py), run in
+   # the curve's own coordinates with a single inversion for the result
+   def multi_scalar_mul(self, scalars, points):
+      scalars, points = list(scalars), list(points)
+      if len(scalars) != len(points):
+         raise ValueError("Got %d scalars but %d points" % (len(scalars), len(points)))
+
+      # the identity adds nothing to the sum
+      terms = [(k, P) for (k, P) in zip(scalars, points) if not isinstance(P, self.Ideal)]
+      if not terms:
+         return self.Ideal(self)
+
+      scalars = [k for (k, _) in terms]
+      points = [self.lift(P) for (_, P) in terms]
+      R = scalarmult.multi_scalar_mul(scalars, points)
+      if self.Coordinates is not None and isinstance(R, self.Coordinates):
+         return R.affine()
+      return R
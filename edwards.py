@@ -1,45 +1,29 @@
-# Twisted Edwards Curve
-class TwistedEdwardsCurve(object):
-   def __init__(self, a, d):
-      self.a = a
-      self.d = d
-
-      self.disc = a * d * (a - d) * (a - d) * (a - d) * (a - d)
-      self.j = 16 * (a * a + 14 * a * d + d * d) * (a * a + 14 * a * d + d * d) * \
-               (a * a + 14 * a * d + d * d) / self.disc
-      if not self.isSmooth():
-         raise Exception("The curve %s is not smooth!" % self)
-
-
-   def isSmooth(self):
-      return self.disc != 0
-
-
-   def testPoint(self, x, y):
-      return self.a * x * x + y*y == 1 + self.d * x * x * y * y
-
+from finitefield.numbertype import integerTypes
+from scalarmult import wnafMultiply
+import scalarmult
+from curve import EdwardsCurve
 
+# Twisted Edwards Curve
+class TwistedEdwardsCurve(EdwardsCurve):
    def __str__(self):
       # return '%sx^2 + y^2 = 1 + %sx^2y^2' % (self.a, self.d)
       return "Original: "
 
 
-   def __repr__(self):
-      return str(self)
-
-
-   def __eq__(self, other):
-      return (self.a, self.d) == (other.a, other.d)
-
-
 
 class Point(object):
-   def __init__(self, curve, x, y):
+   # trusted points are results of arithmetic on points already on the curve,
+   # and are only checked under the curve's 'debug' validation policy
+   def __init__(self, curve, x, y, trusted=False):
       self.curve = curve # the curve containing this point
       self.x = x
       self.y = y
 
-      if not curve.testPoint(x,y):
+      if trusted and curve.validation != 'debug':
+         return
+      if curve.validation == 'lazy':
+         curve.pending.append(self)
+      elif not curve.testPoint(x,y):
          raise Exception("The point %s is not on the given curve %s!" % (self, curve))
 
 
@@ -52,7 +36,7 @@ class Point(object):
 
 
    def __neg__(self):
-      return Point(self.curve, -self.x, self.y)
+      return Point(self.curve, -self.x, self.y, True)
 
 
    def __add__(self, Q):
@@ -66,7 +50,7 @@ class Point(object):
       x3 = ((x1 * y2) + (y1 * x2)) / (1 + self.curve.d * x1 * x2 * y1 * y2)
       y3 = ((y1 * y2) + (x1 * x2)) / (1 - self.curve.d * x1 * x2 * y1 * y2)
 
-      return Point(self.curve, x3, y3)
+      return Point(self.curve, x3, y3, True)
 
    def double(self):
       return self + self
@@ -76,41 +60,47 @@ class Point(object):
       return self + -Q
 
    def __mul__(self, n):
-      if not isinstance(n, int):
+      return self.multiply(n)
+
+   # nP from the width-w NAF of n, which needs about n.bit_length()/(w+1)
+   # additions on top of the doublings
+   def multiply(self, n, width=4):
+      if not isinstance(n, integerTypes):
          raise Exception("Can't scale a point by something which isn't an int!")
 
       if n < 0:
-         return -self * -n
+         return (-self).multiply(-n, width)
 
       if n == 0:
          return Ideal(self.curve)
 
-      Q = self
-      R = self if n & 1 == 1 else Ideal(self.curve)
-
-      i = 2
-      while i <= n:
-         Q += Q
-
-         if n & i == i:
-             R += Q
-
-         i = i << 1
-
-      return R
+      return wnafMultiply(self, n, width)
 
 
    def __rmul__(self, n):
       return self * n
 
+   # aP + bQ sharing one doubling chain (see scalarmult.double_scalar_mul)
+   def double_scalar_mul(self, a, Q, b, method='wnaf'):
+      if self.curve != Q.curve:
+         raise Exception("Can't add points on different curves!")
+      if isinstance(Q, Ideal):
+         return self * a
+
+      return scalarmult.double_scalar_mul(self, a, Q, b, method)
+
    def __list__(self):
       return [self.x, self.y]
 
    def __eq__(self, other):
       if type(other) is Ideal:
          return False
+      if hasattr(other, 'affine'):
+         other = other.affine()
+      elif not isinstance(other, Point):
+         return NotImplemented
 
-      return self.x, self.y == other.x, other.y
+      return (self.x, self.y) == (other.x, other.y)
 
    def __ne__(self, other):
       return not self == other
@@ -118,19 +108,6 @@ class Point(object):
    def __getitem__(self, index):
       return [self.x, self.y][index]
 
-   # def get_for_y(self, x, sign):
-
-   #     # Given a y on the curve, x^2 = (y^2 - 1) / (dy^2 + 1)
-   #     # This is defined for all valid y-coordinates,
-   #     # as dy^2 + 1 = 0 has no solution in the field
-
-   #     x2 = Field((y ** 2 - 1) / (self.curve.d * (y ** 2) + 1))
-   #     if sign:
-   #        print("x: ", x2.sqrt(), "y: ", Field(y))
-   #        return Point(Field(x2).sqrt(), Field(y))
-   #     else:
-   #        return Point((-Field(x2)).sqrt(), Field(y))
-
 
 
 # TODO?
@@ -150,11 +127,21 @@ class Ideal(Point):
       return Q
 
    def __mul__(self, n):
-      if not isinstance(n, int):
+      if not isinstance(n, integerTypes):
          raise Exception("Can't scale a point by something which isn't an int!")
       else:
          return self
 
+   def multiply(self, n, width=4):
+      return self * n
+
+   def double_scalar_mul(self, a, Q, b, method='wnaf'):
+      return Q * b
+
    def __eq__(self, other):
       return type(other) is Ideal
 
+
+# the point classes the shared methods of EdwardsCurve build and expect
+TwistedEdwardsCurve.Point = Point
+TwistedEdwardsCurve.Ideal = Ideal
@@ -1,51 +1,45 @@
 from finitefield.finitefield import FiniteField
+from finitefield.numbertype import integerTypes
+from scalarmult import wnafMultiply
+import scalarmult
+from curve import EdwardsCurve
 
 q = 0x73eda753299d7d483339d80809a1d80553bda402fffe5bfeffffffff00000001
 Fq = FiniteField(q, 1)
 
 # Twisted Edwards Curve
-class ExtendedEdwards(object):
-   def __init__(self, a, d):
-      self.a = a
-      self.d = d
-
-      self.disc = a * d * (a - d) * (a - d) * (a - d) * (a - d)
-      self.j = 16 * (a * a + 14 * a * d + d * d) * (a * a + 14 * a * d + d * d) * \
-               (a * a + 14 * a * d + d * d) / self.disc
-      if not self.isSmooth():
-         raise Exception("The curve %s is not smooth!" % self)
-
-
-   def isSmooth(self):
-      return self.disc != 0
-
-
-   def testPoint(self, x, y):
-      return self.a * x * x + y*y == 1 + self.d * x * x * y * y
-
-
+class ExtendedEdwards(EdwardsCurve):
    def __str__(self):
       # return '%sx^2 + y^2 = 1 + %sx^2y^2' % (self.a, self.d)
       return "Extended: "
 
 
-
-   def __repr__(self):
-      return str(self)
+   # normalize_batch: [ExtendedPoint] -> [Point]
+   # convert a list of extended points to affine points, sharing a single
+   # field inversion between all of them
+   def normalize_batch(self, points):
+      zInverses = self.d.field.batch_inverse([P.z for P in points])
+      return [Point(self, P.x * zInv, P.y * zInv, True) for (P, zInv) in zip(points, zInverses)]
 
 
-   def __eq__(self, other):
-      return (self.a, self.d) == (other.a, other.d)
+   def lift(self, P):
+      return P if isinstance(P, ExtendedPoint) else P.extended()
 
 
 
 class Point(object):
-   def __init__(self, curve, x, y):
+   # trusted points are results of arithmetic on points already on the curve,
+   # and are only checked under the curve's 'debug' validation policy
+   def __init__(self, curve, x, y, trusted=False):
       self.curve = curve # the curve containing this point
       self.x = x
       self.y = y
 
-      if not curve.testPoint(x,y):
+      if trusted and curve.validation != 'debug':
+         return
+      if curve.validation == 'lazy':
+         curve.pending.append(self)
+      elif not curve.testPoint(x,y):
          raise Exception("The point %s is not on the given curve %s!" % (self, curve))
 
 
@@ -58,7 +52,7 @@ class Point(object):
 
 
    def __neg__(self):
-      return Point(self.curve, -self.x, self.y)
+      return Point(self.curve, -self.x, self.y, True)
 
 
    def __add__(self, Q):
@@ -68,10 +62,15 @@ class Point(object):
       # Cost: 7M + 1S + 1*a + 7add dependent upon the first point.
       # Strongly unified.
 
+      # leave anything else (a PointBatch, say) to its own __radd__
+      if not isinstance(Q, (Point, ExtendedPoint)):
+         return NotImplemented
       if self.curve != Q.curve:
          raise Exception("Can't add points on different curves!")
       if isinstance(Q, Ideal):
          return self
+      if isinstance(Q, ExtendedPoint):
+         return Q + self
 
       x1, y1, t1, z1 = self.x, self.y, self.x * self.y, 1
       x2, y2, t2, z2 = Q.x, Q.y, Q.x * Q.y, 1
@@ -87,10 +86,10 @@ class Point(object):
 
       x3 = e * f
       y3 = g * h
-      t3 = e * h
       z3 = f * g
-      
-      return Point(self.curve, x3/z3, y3/z3)
+
+      zInv = z3.inverse()
+      return Point(self.curve, x3 * zInv, y3 * zInv, True)
 
    def double(self):
       # See "Twisted Edwards Curves Revisited" Section 3.3
@@ -109,46 +108,52 @@ class Point(object):
 
       x3 = e * f
       y3 = g * h
-      t3 = e * h
       z3 = f * g
 
-      X3 = x3*(Fq(z3).inverse())
-      Y3 = y3*(Fq(z3).inverse())
-
-      return Point(self.curve, X3, Y3)
-      # return Point(self.curve, x3/z3, y3/z3)
+      zInv = Fq(z3).inverse()
+      return Point(self.curve, x3 * zInv, y3 * zInv, True)
 
 
    def __sub__(self, Q):
       return self + -Q
 
    def __mul__(self, n):
-      if not isinstance(n, int):
+      return self.multiply(n)
+
+   # nP from the width-w NAF of n, computed entirely in extended coordinates
+   # so that only the final affine() needs an inversion
+   def multiply(self, n, width=4):
+      if not isinstance(n, integerTypes):
          raise Exception("Can't scale a point by something which isn't an int!")
 
       if n < 0:
-         return -self * -n
+         return (-self).multiply(-n, width)
 
       if n == 0:
          return Ideal(self.curve)
 
-      Q = self
-      R = self if n & 1 == 1 else Ideal(self.curve)
+      return wnafMultiply(self.extended(), n, width).affine()
 
-      i = 2
-      while i <= n:
-         Q += Q
 
-         if n & i == i:
-             R += Q
-
-         i = i << 1
+   def __rmul__(self, n):
+      return self * n
 
-      return R
+   # aP + bQ sharing one doubling chain (see scalarmult.double_scalar_mul),
+   # computed in extended coordinates with a single inversion
+   def double_scalar_mul(self, a, Q, b, method='wnaf'):
+      if self.curve != Q.curve:
+         raise Exception("Can't add points on different curves!")
+      if isinstance(Q, Ideal):
+         return self * a
+      if a == 0 and b == 0:
+         return Ideal(self.curve)
 
+      return scalarmult.double_scalar_mul(self.extended(), a, Q.extended(), b, method).affine()
 
-   def __rmul__(self, n):
-      return self * n
+   def extended(self):
+      field = self.curve.d.field
+      x, y = field(self.x), field(self.y)
+      return ExtendedPoint(self.curve, x, y, x * y, field(1))
 
    def __list__(self):
       return [self.x, self.y]
@@ -156,8 +161,12 @@ class Point(object):
    def __eq__(self, other):
       if type(other) is Ideal:
          return False
+      if hasattr(other, 'affine'):
+         other = other.affine()
+      elif not isinstance(other, Point):
+         return NotImplemented
 
-      return self.x, self.y == other.x, other.y
+      return (self.x, self.y) == (other.x, other.y)
 
    def __ne__(self, other):
       return not self == other
@@ -165,6 +174,158 @@ class Point(object):
    def __getitem__(self, index):
       return [self.x, self.y][index]
 
+# A point (X:Y:Z:T) standing for the affine point (X/Z, Y/Z), with the extra
+# coordinate T = XY/Z kept up to date by every operation. Nothing is inverted
+# until the point is normalized with affine(). The formulas are the a=-1
+# specializations from "Twisted Edwards Curves Revisited" (Hisil, Wong,
+# Carter, Dawson 2008), which are complete on the Jubjub curve.
+class ExtendedPoint(object):
+   def __init__(self, curve, x, y, t, z):
+      self.curve = curve
+      self.x = x
+      self.y = y
+      self.t = t
+      self.z = z
+
+
+   def __str__(self):
+      return "(%r : %r : %r : %r)" % (self.x, self.y, self.t, self.z)
+
+
+   def __repr__(self):
+      return str(self)
+
+
+   def __neg__(self):
+      return ExtendedPoint(self.curve, -self.x, self.y, -self.t, self.z)
+
+
+   def __add__(self, Q):
+      if not isinstance(Q, (Point, ExtendedPoint)):
+         return NotImplemented
+      if self.curve != Q.curve:
+         raise Exception("Can't add points on different curves!")
+      if isinstance(Q, Ideal):
+         return self
+      if not isinstance(Q, ExtendedPoint):
+         return self.addAffine(Q)
+
+      # https://hyperelliptic.org/EFD/g1p/auto-twisted-extended-1.html#addition-add-2008-hwcd-3
+      # Assumptions: k=2*d.
+      # Cost: 9M + 8add + 2*2: C is computed as 2 (T1 d T2), one more
+      # multiplication than the 8M of the formula with k = 2d precomputed.
+      # compute A = (Y1-X1)(Y2-X2)
+      #         B = (Y1+X1)(Y2+X2)
+      #         C = T1 k T2
+      #         D = Z1 2 Z2
+      #         E = B-A, F = D-C, G = D+C, H = B+A
+      #         X3 = E F, Y3 = G H, T3 = E H, Z3 = F G
+
+      x1, y1, t1, z1 = self.x, self.y, self.t, self.z
+      x2, y2, t2, z2 = Q.x, Q.y, Q.t, Q.z
+
+      a = (y1 - x1) * (y2 - x2)
+      b = (y1 + x1) * (y2 + x2)
+      c = t1 * self.curve.d * t2
+      c = c + c
+      d = z1 * z2
+      d = d + d
+      e = b - a
+      f = d - c
+      g = d + c
+      h = b + a
+
+      return ExtendedPoint(self.curve, e * f, g * h, e * h, f * g)
+
+
+   def addAffine(self, Q):
+      # https://hyperelliptic.org/EFD/g1p/auto-twisted-extended-1.html#addition-madd-2008-hwcd-3
+      # Assumptions: Z2=1, k=2*d.
+      # Cost: 7M + 8add + 2*2, plus 1M for T2 = X2 Y2 of the affine point.
+
+      x1, y1, t1, z1 = self.x, self.y, self.t, self.z
+      x2, y2 = Q.x, Q.y
+
+      a = (y1 - x1) * (y2 - x2)
+      b = (y1 + x1) * (y2 + x2)
+      c = t1 * self.curve.d * (x2 * y2)
+      c = c + c
+      d = z1 + z1
+      e = b - a
+      f = d - c
+      g = d + c
+      h = b + a
+
+      return ExtendedPoint(self.curve, e * f, g * h, e * h, f * g)
+
+
+   def double(self):
+      # https://hyperelliptic.org/EFD/g1p/auto-twisted-extended-1.html#doubling-dbl-2008-hwcd
+      # Cost: 4M + 4S + 1*a + 6add + 1*2.
+      # compute A = X1^2
+      #         B = Y1^2
+      #         C = 2 Z1^2
+      #         D = a A = -A
+      #         E = (X1+Y1)^2-A-B
+      #         G = D+B, F = G-C, H = D-B
+      #         X3 = E F, Y3 = G H, T3 = E H, Z3 = F G
+
+      x1, y1, z1 = self.x, self.y, self.z
+
+      a = x1 * x1
+      b = y1 * y1
+      c = z1 * z1
+      c = c + c
+      d = -a
+      e = (x1 + y1) * (x1 + y1) - a - b
+      g = d + b
+      f = g - c
+      h = d - b
+
+      return ExtendedPoint(self.curve, e * f, g * h, e * h, f * g)
+
+
+   def __sub__(self, Q):
+      return self + -Q
+
+   def __mul__(self, n):
+      return self.multiply(n)
+
+   def multiply(self, n, width=4):
+      if not isinstance(n, integerTypes):
+         raise Exception("Can't scale a point by something which isn't an int!")
+
+      if n < 0:
+         return (-self).multiply(-n, width)
+
+      if n == 0:
+         field = self.curve.d.field
+         return ExtendedPoint(self.curve, field(0), field(1), field(0), field(1))
+
+      return wnafMultiply(self, n, width)
+
+
+   def __rmul__(self, n):
+      return self * n
+
+   def affine(self):
+      zInv = self.z.inverse()
+      return Point(self.curve, self.x * zInv, self.y * zInv, True)
+
+   def __eq__(self, other):
+      if type(other) is Ideal:
+         return False
+      if not isinstance(other, ExtendedPoint):
+         other = other.extended()
+
+      return (self.x * other.z == other.x * self.z and
+              self.y * other.z == other.y * self.z)
+
+   def __ne__(self, other):
+      return not self == other
+
+
+
 # TODO?
 class Ideal(Point):
    def __init__(self, curve):
@@ -182,11 +343,22 @@ class Ideal(Point):
       return Q
 
    def __mul__(self, n):
-      if not isinstance(n, int):
+      if not isinstance(n, integerTypes):
          raise Exception("Can't scale a point by something which isn't an int!")
       else:
          return self
 
+   def multiply(self, n, width=4):
+      return self * n
+
+   def double_scalar_mul(self, a, Q, b, method='wnaf'):
+      return Q * b
+
    def __eq__(self, other):
       return type(other) is Ideal
 
+
+# the point classes the shared methods of EdwardsCurve build and expect
+ExtendedEdwards.Point = Point
+ExtendedEdwards.Ideal = Ideal
+ExtendedEdwards.Coordinates = ExtendedPoint
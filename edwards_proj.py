@@ -1,51 +1,45 @@
 from finitefield.finitefield import FiniteField
+from finitefield.numbertype import integerTypes
+from scalarmult import wnafMultiply
+import scalarmult
+from curve import EdwardsCurve
 
 q = 0x73eda753299d7d483339d80809a1d80553bda402fffe5bfeffffffff00000001
 Fq = FiniteField(q, 1)
 
 # Twisted Edwards Curve
-class ProjectiveEdwards(object):
-   def __init__(self, a, d):
-      self.a = a
-      self.d = d
-
-      self.disc = a * d * (a - d) * (a - d) * (a - d) * (a - d)
-      self.j = 16 * (a * a + 14 * a * d + d * d) * (a * a + 14 * a * d + d * d) * \
-               (a * a + 14 * a * d + d * d) / self.disc
-      if not self.isSmooth():
-         raise Exception("The curve %s is not smooth!" % self)
-
-
-   def isSmooth(self):
-      return self.disc != 0
-
-
-   def testPoint(self, x, y):
-      return self.a * x * x + y*y == 1 + self.d * x * x * y * y
-
-
+class ProjectiveEdwards(EdwardsCurve):
    def __str__(self):
       # return '%sx^2 + y^2 = 1 + %sx^2y^2' % (self.a, self.d)
       return "Projective: "
 
 
+   # normalize_batch: [ProjectivePoint] -> [Point]
+   # convert a list of projective points to affine points, sharing a single
+   # field inversion between all of them
+   def normalize_batch(self, points):
+      zInverses = self.d.field.batch_inverse([P.z for P in points])
+      return [Point(self, P.x * zInv, P.y * zInv, True) for (P, zInv) in zip(points, zInverses)]
 
-   def __repr__(self):
-      return str(self)
 
-
-   def __eq__(self, other):
-      return (self.a, self.d) == (other.a, other.d)
+   def lift(self, P):
+      return P if isinstance(P, ProjectivePoint) else P.projective()
 
 
 
 class Point(object):
-   def __init__(self, curve, x, y):
+   # trusted points are results of arithmetic on points already on the curve,
+   # and are only checked under the curve's 'debug' validation policy
+   def __init__(self, curve, x, y, trusted=False):
       self.curve = curve # the curve containing this point
       self.x = x
       self.y = y
 
-      if not curve.testPoint(x,y):
+      if trusted and curve.validation != 'debug':
+         return
+      if curve.validation == 'lazy':
+         curve.pending.append(self)
+      elif not curve.testPoint(x,y):
          raise Exception("The point %s is not on the given curve %s!" % (self, curve))
 
 
@@ -58,7 +52,7 @@ class Point(object):
 
 
    def __neg__(self):
-      return Point(self.curve, -self.x, self.y)
+      return Point(self.curve, -self.x, self.y, True)
 
 
    def __add__(self, Q):
@@ -77,6 +71,8 @@ class Point(object):
          raise Exception("Can't add points on different curves!")
       if isinstance(Q, Ideal):
          return self
+      if isinstance(Q, ProjectivePoint):
+         return Q + self
 
       x1, y1, z1 = self.x, self.y, 1
       x2, y2, z2 = Q.x, Q.y, 1
@@ -88,8 +84,9 @@ class Point(object):
       x3 = (1 - e) * ((x1 + y1) * (x2 + y2) - c - d)
       y3 = (1 + e) * (d + c)
       z3 = 1 - e * e
-      
-      return Point(self.curve, x3/z3, y3/z3)
+
+      zInv = z3.inverse()
+      return Point(self.curve, x3 * zInv, y3 * zInv, True)
 
 
    def double(self):
@@ -118,44 +115,49 @@ class Point(object):
       y3 = f * (e - d)
       z3 = f * f - 2 * f
 
-      X3 = x3*(Fq(z3).inverse())
-      Y3 = y3*(Fq(z3).inverse())
-
-      return Point(self.curve, X3, Y3)
-      # return Point(self.curve, x3/z3, y3/z3)
-      # return self + self
+      zInv = Fq(z3).inverse()
+      return Point(self.curve, x3 * zInv, y3 * zInv, True)
 
 
    def __sub__(self, Q):
       return self + -Q
 
    def __mul__(self, n):
-      if not isinstance(n, int):
+      return self.multiply(n)
+
+   # nP from the width-w NAF of n, computed entirely in projective coordinates
+   # so that only the final affine() needs an inversion
+   def multiply(self, n, width=4):
+      if not isinstance(n, integerTypes):
          raise Exception("Can't scale a point by something which isn't an int!")
 
       if n < 0:
-         return -self * -n
+         return (-self).multiply(-n, width)
 
       if n == 0:
          return Ideal(self.curve)
 
-      Q = self
-      R = self if n & 1 == 1 else Ideal(self.curve)
+      return wnafMultiply(self.projective(), n, width).affine()
 
-      i = 2
-      while i <= n:
-         Q += Q
 
-         if n & i == i:
-             R += Q
-
-         i = i << 1
+   def __rmul__(self, n):
+      return self * n
 
-      return R
+   # aP + bQ sharing one doubling chain (see scalarmult.double_scalar_mul),
+   # computed in projective coordinates with a single inversion
+   def double_scalar_mul(self, a, Q, b, method='wnaf'):
+      if self.curve != Q.curve:
+         raise Exception("Can't add points on different curves!")
+      if isinstance(Q, Ideal):
+         return self * a
+      if a == 0 and b == 0:
+         return Ideal(self.curve)
 
+      return scalarmult.double_scalar_mul(self.projective(), a, Q.projective(), b, method).affine()
 
-   def __rmul__(self, n):
-      return self * n
+   def projective(self):
+      field = self.curve.d.field
+      return ProjectivePoint(self.curve, field(self.x), field(self.y), field(1))
 
    def __list__(self):
       return [self.x, self.y]
@@ -163,8 +165,12 @@ class Point(object):
    def __eq__(self, other):
       if type(other) is Ideal:
          return False
+      if hasattr(other, 'affine'):
+         other = other.affine()
+      elif not isinstance(other, Point):
+         return NotImplemented
 
-      return self.x, self.y == other.x, other.y
+      return (self.x, self.y) == (other.x, other.y)
 
    def __ne__(self, other):
       return not self == other
@@ -172,6 +178,171 @@ class Point(object):
    def __getitem__(self, index):
       return [self.x, self.y][index]
 
+# A point (X:Y:Z) standing for the affine point (X/Z, Y/Z). Z is carried
+# through additions, doublings and scalar multiplication, so no inversion
+# is done until the point is normalized with affine().
+class ProjectivePoint(object):
+   def __init__(self, curve, x, y, z):
+      self.curve = curve
+      self.x = x
+      self.y = y
+      self.z = z
+
+
+   def __str__(self):
+      return "(%r : %r : %r)" % (self.x, self.y, self.z)
+
+
+   def __repr__(self):
+      return str(self)
+
+
+   def __neg__(self):
+      return ProjectivePoint(self.curve, -self.x, self.y, self.z)
+
+
+   def __add__(self, Q):
+      if self.curve != Q.curve:
+         raise Exception("Can't add points on different curves!")
+      if isinstance(Q, Ideal):
+         return self
+      if not isinstance(Q, ProjectivePoint):
+         return self.addAffine(Q)
+
+      # https://hyperelliptic.org/EFD/g1p/auto-twisted-projective.html#addition-add-2008-bbjlp
+      # Cost: 10M + 1S + 1*a + 1*d + 7add.
+      # compute A = Z1 Z2
+      #         B = A^2
+      #         C = X1 X2
+      #         D = Y1 Y2
+      #         E = d C D
+      #         F = B - E
+      #         G = B + E
+      #         X3 = A F ((X1+Y1)(X2+Y2)-C-D)
+      #         Y3 = A G (D-a C)
+      #         Z3 = F G
+
+      x1, y1, z1 = self.x, self.y, self.z
+      x2, y2, z2 = Q.x, Q.y, Q.z
+
+      a = z1 * z2
+      b = a * a
+      c = x1 * x2
+      d = y1 * y2
+      e = self.curve.d * c * d
+      f = b - e
+      g = b + e
+
+      x3 = a * f * ((x1 + y1) * (x2 + y2) - c - d)
+      y3 = a * g * (d - self.curve.a * c)
+      z3 = f * g
+
+      return ProjectivePoint(self.curve, x3, y3, z3)
+
+
+   def addAffine(self, Q):
+      # https://hyperelliptic.org/EFD/g1p/auto-twisted-projective.html#addition-madd-2008-bbjlp
+      # Assumptions: Z2=1.
+      # Cost: 9M + 1S + 1*a + 1*d + 7add.
+      # compute B = Z1^2
+      #         C = X1 X2
+      #         D = Y1 Y2
+      #         E = d C D
+      #         F = B - E
+      #         G = B + E
+      #         X3 = Z1 F ((X1+Y1)(X2+Y2)-C-D)
+      #         Y3 = Z1 G (D-a C)
+      #         Z3 = F G
+
+      x1, y1, z1 = self.x, self.y, self.z
+      x2, y2 = Q.x, Q.y
+
+      b = z1 * z1
+      c = x1 * x2
+      d = y1 * y2
+      e = self.curve.d * c * d
+      f = b - e
+      g = b + e
+
+      x3 = z1 * f * ((x1 + y1) * (x2 + y2) - c - d)
+      y3 = z1 * g * (d - self.curve.a * c)
+      z3 = f * g
+
+      return ProjectivePoint(self.curve, x3, y3, z3)
+
+
+   def double(self):
+      # https://hyperelliptic.org/EFD/g1p/auto-twisted-projective.html#doubling-dbl-2008-bbjlp
+      # Cost: 3M + 4S + 1*a + 6add + 1*2.
+      # compute B = (X1+Y1)^2
+      #         C = X1^2
+      #         D = Y1^2
+      #         E = a C
+      #         F = E + D
+      #         H = Z1^2
+      #         J = F - 2H
+      #         X3 = (B-C-D) J
+      #         Y3 = F (E-D)
+      #         Z3 = F J
+
+      x1, y1, z1 = self.x, self.y, self.z
+
+      b = (x1 + y1) * (x1 + y1)
+      c = x1 * x1
+      d = y1 * y1
+      e = self.curve.a * c
+      f = e + d
+      h = z1 * z1
+      j = f - h - h
+
+      x3 = (b - c - d) * j
+      y3 = f * (e - d)
+      z3 = f * j
+
+      return ProjectivePoint(self.curve, x3, y3, z3)
+
+
+   def __sub__(self, Q):
+      return self + -Q
+
+   def __mul__(self, n):
+      return self.multiply(n)
+
+   def multiply(self, n, width=4):
+      if not isinstance(n, integerTypes):
+         raise Exception("Can't scale a point by something which isn't an int!")
+
+      if n < 0:
+         return (-self).multiply(-n, width)
+
+      if n == 0:
+         field = self.curve.d.field
+         return ProjectivePoint(self.curve, field(0), field(1), field(1))
+
+      return wnafMultiply(self, n, width)
+
+
+   def __rmul__(self, n):
+      return self * n
+
+   def affine(self):
+      zInv = self.z.inverse()
+      return Point(self.curve, self.x * zInv, self.y * zInv, True)
+
+   def __eq__(self, other):
+      if type(other) is Ideal:
+         return False
+      if not isinstance(other, ProjectivePoint):
+         other = other.projective()
+
+      return (self.x * other.z == other.x * self.z and
+              self.y * other.z == other.y * self.z)
+
+   def __ne__(self, other):
+      return not self == other
+
+
+
 # TODO?
 class Ideal(Point):
    def __init__(self, curve):
@@ -189,11 +360,22 @@ class Ideal(Point):
       return Q
 
    def __mul__(self, n):
-      if not isinstance(n, int):
+      if not isinstance(n, integerTypes):
          raise Exception("Can't scale a point by something which isn't an int!")
       else:
          return self
 
+   def multiply(self, n, width=4):
+      return self * n
+
+   def double_scalar_mul(self, a, Q, b, method='wnaf'):
+      return Q * b
+
    def __eq__(self, other):
       return type(other) is Ideal
 
+
+# the point classes the shared methods of EdwardsCurve build and expect
+ProjectiveEdwards.Point = Point
+ProjectiveEdwards.Ideal = Ideal
+ProjectiveEdwards.Coordinates = ProjectivePoint
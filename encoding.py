@@ -0,0 +1,182 @@
+# Binary point encodings. A compressed point is 32 bytes, in the layout Zcash
+# uses for Jubjub: the canonical y coordinate as a little-endian integer, with
+# the sign of x (its least significant bit) stored in the top bit of the last
+# byte. An uncompressed point is 64 bytes: x and then y, both 32 bytes
+# little-endian. Used by the compress/decompress and encode_into/decode_from
+# methods of the curve classes.
+
+import mmap
+import struct
+
+# a 256-bit integer as four little-endian 64-bit words
+word = 0xffffffffffffffff
+fourWords = struct.Struct('<4Q')
+eightWords = struct.Struct('<8Q')
+
+
+# the 32-byte little-endian encoding of 0 <= n < 2^256
+def intToBytes(n):
+   return bytearray((n >> (8 * i)) & 0xff for i in range(32))
+
+
+def bytesToInt(buf):
+   n = 0
+   for byte in reversed(bytearray(buf)):
+      n = (n << 8) | byte
+   return n
+
+
+# coordinates: Point -> int, int
+# the coordinates of a point reduced mod p: a point built from plain ints,
+# and its negative, can hold values outside [0, p)
+def coordinates(P):
+   p = P.curve.d.field.p
+   return int(P.x) % p, int(P.y) % p
+
+
+# compress: Point -> bytes
+def compress(P):
+   x, y = coordinates(P)
+   encoding = intToBytes(y)
+   encoding[31] |= (x & 1) << 7
+   return bytes(encoding)
+
+
+# split an encoding into y and the sign bit of x, rejecting anything that
+# is not the canonical encoding of a field element
+def parse(buf, p):
+   if len(buf) != 32:
+      raise ValueError("A compressed point is 32 bytes long, not %d" % len(buf))
+
+   n = bytesToInt(buf)
+   y, sign = n & ((1 << 255) - 1), n >> 255
+   if y >= p:
+      raise ValueError("The encoded y coordinate %d is not reduced mod %d" % (y, p))
+
+   return y, sign
+
+
+# decompress_batch: curve, [bytes], Point class -> [Point]
+def decompress_batch(curve, buffers, Point):
+   return recoverPoints(curve, [parse(buf, curve.d.field.p) for buf in buffers], Point)
+
+
+# recoverPoints: curve, [(int, int)], Point class -> [Point]
+# recover the points from their y coordinates and the signs of their x
+# coordinates. Each x comes from x^2 = (1 - y^2) / (a - d y^2), and the
+# denominators of the whole batch are inverted together with Montgomery's
+# trick, leaving one square root (and no inversion) per point.
+def recoverPoints(curve, parsed, Point):
+   field = curve.d.field
+   ySquares = [field(y) * field(y) for (y, _) in parsed]
+   denominators = [curve.a - curve.d * yy for yy in ySquares]
+   inverses = field.batch_inverse(denominators)
+
+   points = []
+   for (y, sign), yy, inverse in zip(parsed, ySquares, inverses):
+      try:
+         x = ((1 - yy) * inverse).sqrt()
+      except ValueError:
+         raise ValueError("No point on the curve has y coordinate %d" % y)
+
+      if int(x) == 0 and sign:
+         raise ValueError("The point with y coordinate %d has x = 0, which has no negative" % y)
+      if int(x) & 1 != sign:
+         x = -x
+
+      points.append(Point(curve, x, field(y), True))
+
+   return points
+
+
+# recordSize: bool -> int
+# the number of bytes per point in the bulk formats below
+def recordSize(compressed):
+   return 32 if compressed else 64
+
+
+# encode_into: [Point], writable buffer, int, bool -> int
+# write the points as consecutive fixed-width records into a preallocated
+# bytearray, memoryview or mmap starting at offset, packing the coordinates
+# straight into the buffer as 64-bit words, and return the offset just past
+# the last record
+def encode_into(points, buf, offset=0, compressed=False):
+   size = recordSize(compressed)
+   if offset + size * len(points) > len(buf):
+      raise ValueError("%d points need %d bytes, but the buffer only has %d after offset %d" %
+                         (len(points), size * len(points), len(buf) - offset, offset))
+
+   for P in points:
+      x, y = coordinates(P)
+      if compressed:
+         top = (y >> 192) | ((x & 1) << 63)
+         fourWords.pack_into(buf, offset, y & word, (y >> 64) & word, (y >> 128) & word, top)
+      else:
+         eightWords.pack_into(buf, offset, x & word, (x >> 64) & word, (x >> 128) & word, x >> 192,
+                                           y & word, (y >> 64) & word, (y >> 128) & word, y >> 192)
+      offset += size
+
+   return offset
+
+
+# decode_from: curve, buffer, Point class, int, int, bool -> [Point]
+# read count records (by default, all remaining ones) from a bytes-like object
+# or mmap starting at offset, unpacking the words in place. Uncompressed
+# points go through the curve's validation policy like any other outside
+# input; compressed ones are recovered with a single batched inversion.
+def decode_from(curve, buf, Point, offset=0, count=None, compressed=False):
+   size = recordSize(compressed)
+   if count is None:
+      count = (len(buf) - offset) // size
+   if offset + size * count > len(buf):
+      raise ValueError("The buffer holds fewer than %d points after offset %d" % (count, offset))
+
+   field = curve.d.field
+   p = field.p
+
+   if compressed:
+      parsed = []
+      for i in range(offset, offset + size * count, size):
+         w0, w1, w2, w3 = fourWords.unpack_from(buf, i)
+         y = w0 | (w1 << 64) | (w2 << 128) | ((w3 & (word >> 1)) << 192)
+         if y >= p:
+            raise ValueError("The encoded y coordinate %d is not reduced mod %d" % (y, p))
+         parsed.append((y, w3 >> 63))
+
+      return recoverPoints(curve, parsed, Point)
+
+   points = []
+   for i in range(offset, offset + size * count, size):
+      w = eightWords.unpack_from(buf, i)
+      x = w[0] | (w[1] << 64) | (w[2] << 128) | (w[3] << 192)
+      y = w[4] | (w[5] << 64) | (w[6] << 128) | (w[7] << 192)
+      if x >= p or y >= p:
+         raise ValueError("The encoded point (%d, %d) is not reduced mod %d" % (x, y, p))
+      points.append(Point(curve, field(x), field(y)))
+
+   return points
+
+
+# save: [Point], str, bool -> None
+# write the points to a file in one of the formats above
+def save(points, path, compressed=False):
+   buf = bytearray(recordSize(compressed) * len(points))
+   encode_into(points, buf, 0, compressed)
+   with open(path, 'wb') as f:
+      f.write(buf)
+
+
+# load: curve, str, Point class, bool -> [Point]
+# read back a file written by save, decoding straight out of a read-only
+# memory map of it rather than reading it into memory first
+def load(curve, path, Point, compressed=False):
+   with open(path, 'rb') as f:
+      f.seek(0, 2)
+      if f.tell() == 0:
+         return []
+
+      mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+      try:
+         return decode_from(curve, mapped, Point, 0, None, compressed)
+      finally:
+         mapped.close()
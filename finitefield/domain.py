@@ -0,0 +1,137 @@
+# Evaluation domains: the multiplicative subgroup H of order n (a power of
+# two) of a prime field, generated by a primitive n-th root of unity w, and
+# its coset zH for a fixed shift z outside H. A polynomial of degree below n
+# is stored either by its coefficients or by its values on H (or zH), and the
+# radix-2 FFT of ntt.py converts between the two in O(n log n) operations.
+#
+# The domain keeps the twiddle factors w^i (i < n/2) that every transform
+# needs, as well as their inverses, 1/n and the powers of the coset shift,
+# so repeated transforms only do the butterflies. Building the table costs
+# one multiplication per entry, which is less than parsing it back from a
+# file would, so it is always computed rather than stored.
+
+from .ntt import butterflies, nonSquare, powers, rootOfUnity
+from .polynomial import polynomialsOver
+
+class EvaluationDomain(object):
+   def __init__(self, field, size, twiddles=None, shift=None):
+      p = field.p
+      self.field = field
+      self.p = p
+      self.size = size
+      self.Polynomial = polynomialsOver(field)
+
+      self.root = rootOfUnity(field, size)
+      self.rootInverse = pow(self.root, p - 2, p)
+      self.sizeInverse = pow(size, p - 2, p)
+
+      if twiddles is None:
+         twiddles = powers(self.root, size >> 1, p)
+      elif len(twiddles) != size >> 1:
+         raise ValueError("A domain of size %d needs %d twiddle factors, not %d" % (size, size >> 1, len(twiddles)))
+      self.twiddles = twiddles
+
+      # w^(-i) = -w^(n/2 - i)
+      self.inverseTwiddles = ([1] + [p - w for w in reversed(twiddles[1:])])[:size >> 1]
+
+      self.shift = int(shift) % p if shift is not None else nonSquare(field)
+      if pow(self.shift, size, p) == 1:
+         raise ValueError("The coset shift %d lies in the domain itself" % self.shift)
+      self.shiftPowers = None
+      self.shiftInversePowers = None
+
+
+   def __len__(self):
+      return self.size
+
+
+   # the elements w^i of the domain as field elements
+   def elements(self):
+      return [self.field(x) for x in powers(self.root, self.size, self.p)]
+
+
+   def checkLength(self, values):
+      if len(values) != self.size:
+         raise ValueError("Expected %d values for a domain of size %d, not %d" % (self.size, self.size, len(values)))
+
+
+   # fft: [int] -> None
+   # replace the coefficients (ints mod p, lowest degree first) of a
+   # polynomial of degree below n by its values at w^0, ..., w^(n-1)
+   def fft(self, values):
+      self.checkLength(values)
+      butterflies(values, self.twiddles, self.p)
+
+
+   # ifft: [int] -> None
+   # the inverse of fft: values on the domain back to coefficients
+   def ifft(self, values):
+      self.checkLength(values)
+      butterflies(values, self.inverseTwiddles, self.p)
+
+      p, sizeInverse = self.p, self.sizeInverse
+      for i in range(self.size):
+         values[i] = values[i] * sizeInverse % p
+
+
+   # coset_fft: [int] -> None
+   # the values at z w^0, ..., z w^(n-1) instead, i.e. the fft of the
+   # coefficients scaled by the powers of the shift z
+   def coset_fft(self, values):
+      self.checkLength(values)
+      if self.shiftPowers is None:
+         self.shiftPowers = powers(self.shift, self.size, self.p)
+
+      p = self.p
+      for i, zi in enumerate(self.shiftPowers):
+         values[i] = values[i] * zi % p
+
+      self.fft(values)
+
+
+   # coset_ifft: [int] -> None
+   # the inverse of coset_fft
+   def coset_ifft(self, values):
+      self.ifft(values)
+      if self.shiftInversePowers is None:
+         self.shiftInversePowers = powers(pow(self.shift, self.p - 2, self.p), self.size, self.p)
+
+      p = self.p
+      for i, zi in enumerate(self.shiftInversePowers):
+         values[i] = values[i] * zi % p
+
+
+   # the coefficients of a polynomial as a list of n ints
+   def coefficients(self, polynomial):
+      if polynomial.degree() >= self.size:
+         raise ValueError("A polynomial of degree %d doesn't fit in a domain of size %d" % (polynomial.degree(), self.size))
+
+      return [int(c) for c in polynomial] + [0] * (self.size - len(polynomial))
+
+
+   # evaluate: Polynomial -> [element]
+   def evaluate(self, polynomial):
+      values = self.coefficients(polynomial)
+      self.fft(values)
+      return [self.field(x) for x in values]
+
+
+   # interpolate: [element] -> Polynomial
+   # the polynomial of degree below n with the given values on the domain
+   def interpolate(self, values):
+      values = [int(x) for x in values]
+      self.ifft(values)
+      return self.Polynomial([self.field(x) for x in values])
+
+
+   def coset_evaluate(self, polynomial):
+      values = self.coefficients(polynomial)
+      self.coset_fft(values)
+      return [self.field(x) for x in values]
+
+
+   def coset_interpolate(self, values):
+      values = [int(x) for x in values]
+      self.coset_ifft(values)
+      return self.Polynomial([self.field(x) for x in values])
+
@@ -1,7 +1,12 @@
+from .numbertype import integerTypes
+
 
 # a general Euclidean algorithm for any number type with
 # a divmod and a valuation abs() whose minimum value is zero
 def gcd(a, b):
+   if isHalfGcdPair(a, b):
+      return halfGcdExtended(a, b)[2]
+
    if abs(a) < abs(b):
       return gcd(b, a)
 
@@ -15,10 +20,21 @@ def gcd(a, b):
 # extendedEuclideanAlgorithm: int, int -> int, int, int
 # input (a,b) and output three numbers x,y,d such that ax + by = d = gcd(a,b).
 # Works for any number type with a divmod and a valuation abs()
-# whose minimum value is zero
+# whose minimum value is zero. Nonnegative ints go to Lehmer's algorithm and
+# polynomials of large degree to the half-gcd algorithm below.
 def extendedEuclideanAlgorithm(a, b):
+   if type(a) in integerTypes and type(b) in integerTypes and a >= 0 and b >= 0:
+      return lehmerExtended(a, b)
+   if isHalfGcdPair(a, b):
+      return halfGcdExtended(a, b)
+
+   return euclideanExtended(a, b)
+
+
+# the divmod loop behind extendedEuclideanAlgorithm, for any number type
+def euclideanExtended(a, b):
    if abs(b) > abs(a):
-      (x,y,d) = extendedEuclideanAlgorithm(b, a)
+      (x,y,d) = euclideanExtended(b, a)
       return (y,x,d)
 
    if abs(b) == 0:
@@ -33,3 +49,156 @@ def extendedEuclideanAlgorithm(a, b):
 
    return (x2, y2, a)
 
+
+
+# Lehmer's algorithm (Knuth, TAOCP vol. 2, Algorithm 4.5.2L) works on the
+# leading 64 bits of a and b, where it can find a run of quotients with small
+# ints only, and then applies all of them to the full numbers as one 2x2
+# matrix. In CPython a small int costs about as much to handle as a 255-bit
+# one, so this only pays off on numbers of more than lehmerMinBits bits, and
+# smaller ones (field elements included) go straight to the divmod loop.
+# Either way only the cofactor of a is carried along; the other one is solved
+# for at the end.
+# In particular Lehmer's steps never run for inversions in 255-bit fields
+# such as Jubjub's: those only ever take the divmod loop, and what they gain
+# over euclideanExtended is just the dropped cofactor.
+lehmerBits = 64
+lehmerMinBits = 2048
+
+# lehmerExtended: int, int -> int, int, int
+# the same x,y,d as extendedEuclideanAlgorithm for a, b >= 0
+def lehmerExtended(a, b):
+   if b > a:
+      (x,y,d) = lehmerExtended(b, a)
+      return (y,x,d)
+
+   if b == 0:
+      return (1, 0, a)
+
+   a0, b0 = a, b
+   x0, x1 = 1, 0  # a = x0 a0 (mod b0), b = x1 a0 (mod b0)
+
+   while b.bit_length() > lehmerBits and a.bit_length() >= lehmerMinBits:
+      shift = a.bit_length() - lehmerBits
+      u, v = a >> shift, b >> shift
+      A, B, C, D = 1, 0, 0, 1
+
+      # the quotients of (u + A)/(v + C) and (u + B)/(v + D) bracket the
+      # true one; stop as soon as they disagree
+      while v + C != 0 and v + D != 0:
+         q = (u + A) // (v + C)
+         if q != (u + B) // (v + D):
+            break
+
+         A, C = C, A - q*C
+         B, D = D, B - q*D
+         u, v = v, u - q*v
+
+      if B == 0:
+         # not even one quotient was certain: take a full division step
+         q, r = divmod(a, b)
+         a, b = b, r
+         x0, x1 = x1, x0 - q*x1
+      else:
+         a, b = A*a + B*b, C*a + D*b
+         x0, x1 = A*x0 + B*x1, C*x0 + D*x1
+
+   while b:
+      q, r = divmod(a, b)
+      a, b = b, r
+      x0, x1 = x1, x0 - q*x1
+
+   return (x0, (a - x0 * a0) // b0, a)
+
+
+# The half-gcd algorithm (Thull and Yap, "A unified approach to HGCD
+# algorithms for polynomials and integers", 1990) finds the first half of the
+# remainder sequence of two polynomials from the first halves of their
+# coefficients alone, recursively, and so reduces the gcd to O(log n)
+# polynomial multiplications of the sizes of the inputs instead of n division
+# steps. Below halfGcdDegree it is slower than the plain loop.
+halfGcdDegree = 200
+
+# isHalfGcdPair: any, any -> bool
+# whether a and b are polynomials of the same type large enough for the
+# half-gcd algorithm. Polynomials are recognized by degree(): the extension
+# field elements of extension.py also have coefficients, but aren't
+# polynomials.
+def isHalfGcdPair(a, b):
+   return (type(a) is type(b) and hasattr(a, 'degree') and
+           max(a.degree(), b.degree()) >= halfGcdDegree)
+
+
+# polynomial matrices are tuples (m00, m01, m10, m11) acting on column
+# vectors (a, b)
+def matrixTimesVector(M, a, b):
+   return (M[0]*a + M[1]*b, M[2]*a + M[3]*b)
+
+
+def matrixTimesMatrix(M, N):
+   return (M[0]*N[0] + M[1]*N[2], M[0]*N[1] + M[1]*N[3],
+           M[2]*N[0] + M[3]*N[2], M[2]*N[1] + M[3]*N[3])
+
+
+# a // x^k, dropping the k lowest coefficients
+def shiftDown(a, k):
+   return type(a)(a.coefficients[k:])
+
+
+# halfGcd: Polynomial, Polynomial -> matrix
+# for deg a > deg b, a matrix M of determinant +-1 taking (a, b) to two
+# consecutive remainders (c, d) of their Euclidean remainder sequence with
+# deg c >= m > deg d, for m = ceil(deg a / 2)
+def halfGcd(a, b):
+   Polynomial = type(a)
+   one, zero = Polynomial([a.field(1)]), Polynomial([])
+   identity = (one, zero, zero, one)
+
+   m = (a.degree() + 1) // 2
+   if b.degree() < m:
+      return identity
+
+   R = halfGcd(shiftDown(a, m), shiftDown(b, m))
+   c, d = matrixTimesVector(R, a, b)
+   if d.degree() < m:
+      return R
+
+   q, r = divmod(c, d)
+   R = matrixTimesMatrix((zero, one, one, -q), R)
+   c, d = d, r
+   if d.degree() < m:
+      return R
+
+   k = 2*m - c.degree()
+   S = halfGcd(shiftDown(c, k), shiftDown(d, k))
+   return matrixTimesMatrix(S, R)
+
+
+# halfGcdExtended: Polynomial, Polynomial -> Polynomial, Polynomial, Polynomial
+# the same x,y,d as extendedEuclideanAlgorithm, by repeated half-gcd steps
+def halfGcdExtended(a, b):
+   if b.degree() > a.degree():
+      (x,y,d) = halfGcdExtended(b, a)
+      return (y,x,d)
+
+   Polynomial = type(a)
+   one, zero = Polynomial([a.field(1)]), Polynomial([])
+   M = (one, zero, zero, one)
+
+   if a.degree() == b.degree() and not b.isZero():
+      q, r = divmod(a, b)
+      M = (zero, one, one, -q)
+      a, b = b, r
+
+   while not b.isZero():
+      R = halfGcd(a, b)
+      a, b = matrixTimesVector(R, a, b)
+      M = matrixTimesMatrix(R, M)
+      if b.isZero():
+         break
+
+      q, r = divmod(a, b)
+      M = matrixTimesMatrix((zero, one, one, -q), M)
+      a, b = b, r
+
+   return (M[0], M[1], a)
@@ -0,0 +1,94 @@
+# Exponentiation by a fixed exponent, compiled once into an addition chain.
+#
+# The chain is the sliding-window one: the exponent is cut from the top into
+# windows of at most w bits that start and end with a 1 bit, separated by runs
+# of zeros. x^n is then the odd power x^d of the top window followed, for
+# every further window, by one squaring per bit and one multiplication by the
+# tabulated odd power x^d. For a 255-bit exponent and w = 5 that is about 255
+# squarings plus 16 + 43 multiplications, against the 128 multiplications of
+# square-and-multiply. Compiling the chain separately from evaluating it means
+# exponents that are used over and over, such as p - 2 for inversion, are only
+# scanned once.
+
+
+# slidingWindowCost: int, int -> int
+# the number of multiplications (squarings included) of the sliding-window
+# chain of width w for an exponent of the given bit length: the 2^(w-2)
+# table entries, then one squaring per bit and about one multiplication per
+# w+1 bits
+def slidingWindowCost(bits, width):
+   table = 1 << (width - 2) if width > 1 else 0
+   return table + bits + bits // (width + 1)
+
+
+class AdditionChain(object):
+   def __init__(self, n, width=None):
+      if n < 1:
+         raise ValueError("An addition chain needs a positive exponent, not %d" % n)
+
+      bits = n.bit_length()
+      if width is None:
+         width = min(range(1, 9), key=lambda w: slidingWindowCost(bits, w))
+
+      self.exponent = n
+      self.width = width
+
+      # (squarings, digit) pairs: square that many times, then multiply by
+      # x^digit unless the digit is 0. The squarings of the first step are
+      # the ones that build up its digit, so they are skipped.
+      self.steps = []
+      binary = bin(n)[2:].rstrip('L')
+      i, zeros = 0, 0
+      while i < len(binary):
+         if binary[i] == '0':
+            zeros += 1
+            i += 1
+            continue
+
+         j = min(i + width, len(binary))
+         while binary[j - 1] == '0':
+            j -= 1
+
+         self.steps.append((zeros + j - i, int(binary[i:j], 2)))
+         zeros, i = 0, j
+
+      if zeros:
+         self.steps.append((zeros, 0))
+
+      self.maxDigit = max(digit for (_, digit) in self.steps)
+
+
+   # the number of multiplications and squarings one evaluation costs
+   def __len__(self):
+      table = self.maxDigit >> 1
+      if self.maxDigit > 1:
+         table += 1
+      operations = sum(squarings + (digit != 0) for (squarings, digit) in self.steps[1:])
+      return table + operations
+
+
+   # evaluate x^n for anything with a *, reducing every product mod the
+   # modulus if one is given
+   def __call__(self, x, modulus=None):
+      if modulus is not None:
+         x = x % modulus
+
+      table = {1: x}
+      if self.maxDigit > 1:
+         xx = x * x if modulus is None else (x * x) % modulus
+         for digit in range(3, self.maxDigit + 1, 2):
+            previous = table[digit - 2] * xx
+            table[digit] = previous if modulus is None else previous % modulus
+
+      R = table[self.steps[0][1]]
+      for (squarings, digit) in self.steps[1:]:
+         for _ in range(squarings):
+            R = R * R if modulus is None else (R * R) % modulus
+
+         if digit:
+            R = R * table[digit] if modulus is None else (R * table[digit]) % modulus
+
+      return R
+
+   def __repr__(self):
+      return 'AdditionChain(%d, width=%d)' % (self.exponent, self.width)
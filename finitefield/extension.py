@@ -0,0 +1,291 @@
+# Quadratic and cubic extensions F_{p^m} = Z/p[t] / (t^m - beta) of a prime
+# field by a binomial modulus, with elements stored as m ints mod p instead of
+# as a Polynomial reduced by the generic %. Reducing by t^m - beta is just
+# replacing t^m by beta, so products are written out by hand: Karatsuba-style
+# multiplication (3 products for m = 2, 6 for m = 3 instead of 4 and 9),
+# complex and Chung-Hasan squaring, inversion through the norm to Z/p, and a
+# Frobenius map p-th power that costs one multiplication per coefficient.
+#
+# FiniteField(p, m) returns these classes for m = 2 or 3 when the modulus it
+# is given (or the one it picks) is a binomial.
+
+from .modp import IntegersModP
+from .numbertype import *
+from .polynomial import polynomialsOver
+
+
+# binomialConstant: Polynomial, int -> int or None
+# beta if the polynomial of degree m is a multiple of t^m - beta, else None
+def binomialConstant(polynomial, m):
+   coefficients = polynomial.coefficients
+   if polynomial.degree() != m or any(int(c) for c in coefficients[1:m]):
+      return None
+
+   p = polynomial.field.p
+   return -int(coefficients[0]) * pow(int(coefficients[m]), p - 2, p) % p
+
+
+# findBinomialConstant: int, int -> int or None
+# the first beta, trying -1 and then 2, 3, ..., for which t^m - beta is
+# irreducible over Z/p (m = 2 or 3), i.e. for which beta is not an m-th
+# power; None if every element is an m-th power
+def findBinomialConstant(p, m):
+   if p == 2 or (p - 1) % m != 0:
+      return None
+
+   beta = p - 1
+   while pow(beta, (p - 1) // m, p) == 1:
+      beta = beta + 1 if beta < p - 1 else 2
+      if beta == p - 1:
+         return None
+
+   return beta
+
+
+# coefficientsOf: any, class, int -> [int]
+# the m coefficients, as ints mod p, of anything the generic F_{p^m} accepts:
+# an element, an int or element of Z/p, a Polynomial, or a coefficient list
+def coefficientsOf(value, cls, m):
+   if type(value) is cls:
+      return value.coefficients()
+   if type(value) in integerTypes or type(value) is cls.primeSubfield:
+      return [int(value) % cls.primeSubfield.p] + [0] * (m - 1)
+
+   Polynomial = polynomialsOver(cls.primeSubfield)
+   if isinstance(value, Polynomial):
+      poly = value % cls.idealGenerator
+   else:
+      poly = Polynomial([cls.primeSubfield(x) for x in value]) % cls.idealGenerator
+
+   coefficients = [int(c) for c in poly]
+   return coefficients + [0] * (m - len(coefficients))
+
+
+# signed: int, int -> int
+# the representative of n mod p of least absolute value, so multiplying by a
+# small negative beta like -1 stays cheap
+def signed(n, p):
+   return n - p if n > p // 2 else n
+
+
+@memoize
+def QuadraticExtension(p, beta):
+   Zp = IntegersModP(p)
+   Polynomial = polynomialsOver(Zp)
+   b = signed(beta, p)
+   new = object.__new__
+
+   def trusted(c0, c1):
+      element = new(Fq2)
+      element.c0, element.c1 = c0, c1
+      return element
+
+   class Fq2(FieldElement):
+      __slots__ = ('c0', 'c1')
+      operatorPrecedence = 3
+
+      def __init__(self, value):
+         try:
+            self.c0, self.c1 = coefficientsOf(value, Fq2, 2)
+         except TypeError:
+            raise TypeError("Can't cast type %s to %s in __init__" % (type(value).__name__, Fq2.__name__))
+
+      def coefficients(self):
+         return [self.c0, self.c1]
+
+      @property
+      def poly(self):
+         return Polynomial([Zp(self.c0), Zp(self.c1)])
+
+      @typecheck
+      def __add__(self, other):
+         return trusted((self.c0 + other.c0) % p, (self.c1 + other.c1) % p)
+
+      @typecheck
+      def __sub__(self, other):
+         return trusted((self.c0 - other.c0) % p, (self.c1 - other.c1) % p)
+
+      def __neg__(self):
+         return trusted(-self.c0 % p, -self.c1 % p)
+
+      # (a0 + a1 t)(b0 + b1 t) = a0 b0 + beta a1 b1 + ((a0 + a1)(b0 + b1) - a0 b0 - a1 b1) t
+      @typecheck
+      def __mul__(self, other):
+         if self is other:
+            return self.square()
+
+         a0, a1, b0, b1 = self.c0, self.c1, other.c0, other.c1
+         v0, v1 = a0 * b0, a1 * b1
+         return trusted((v0 + b * v1) % p, ((a0 + a1) * (b0 + b1) - v0 - v1) % p)
+
+      # complex squaring: (a0 + a1 t)^2 = (a0 + a1)(a0 + beta a1) - (1 + beta) a0 a1 + 2 a0 a1 t
+      def square(self):
+         a0, a1 = self.c0, self.c1
+         v0 = a0 * a1
+         return trusted(((a0 + a1) * (a0 + b * a1) - v0 - b * v0) % p, 2 * v0 % p)
+
+      # the norm (a0 + a1 t)(a0 - a1 t) = a0^2 - beta a1^2 in Z/p
+      def norm(self):
+         return Zp(self.c0 * self.c0 - b * self.c1 * self.c1)
+
+      def inverse(self):
+         norm = self.norm()
+         if norm == 0:
+            raise ZeroDivisionError("0 has no inverse in %s" % Fq2.__name__)
+
+         n = int(norm.inverse())
+         return trusted(self.c0 * n % p, -self.c1 * n % p)
+
+      # the k-th power of the Frobenius map x -> x^p, using t^(p^k) = gamma_k t
+      def frobenius(self, k=1):
+         return trusted(self.c0, self.c1 * Fq2.frobeniusCoefficients[k % 2] % p)
+
+      @typecheck
+      def __eq__(self, other):
+         return isinstance(other, Fq2) and self.c0 == other.c0 and self.c1 == other.c1
+
+      @typecheck
+      def __ne__(self, other):
+         return not isinstance(other, Fq2) or self.c0 != other.c0 or self.c1 != other.c1
+
+      def __hash__(self):
+         return hash((self.c0, self.c1))
+
+      @typecheck
+      def __divmod__(self, divisor):
+         q,r = divmod(self.poly, divisor.poly)
+         return (Fq2(q), Fq2(r))
+
+      def __abs__(self): return abs(self.poly)
+      def __repr__(self): return repr(self.poly) + ' \u2208 ' + self.__class__.__name__
+
+   Fq2.fieldSize = p ** 2
+   Fq2.primeSubfield = Zp
+   Fq2.idealGenerator = Polynomial([Zp(-beta), Zp(0), Zp(1)])
+   Fq2.beta = beta
+   Fq2.frobeniusCoefficients = [1, pow(beta, (p - 1) // 2, p)]
+   Fq2.field = Fq2
+   Fq2.__name__ = 'F_{%d^%d}' % (p, 2)
+   return Fq2
+
+
+@memoize
+def CubicExtension(p, beta):
+   Zp = IntegersModP(p)
+   Polynomial = polynomialsOver(Zp)
+   b = signed(beta, p)
+   new = object.__new__
+
+   def trusted(c0, c1, c2):
+      element = new(Fq3)
+      element.c0, element.c1, element.c2 = c0, c1, c2
+      return element
+
+   class Fq3(FieldElement):
+      __slots__ = ('c0', 'c1', 'c2')
+      operatorPrecedence = 3
+
+      def __init__(self, value):
+         try:
+            self.c0, self.c1, self.c2 = coefficientsOf(value, Fq3, 3)
+         except TypeError:
+            raise TypeError("Can't cast type %s to %s in __init__" % (type(value).__name__, Fq3.__name__))
+
+      def coefficients(self):
+         return [self.c0, self.c1, self.c2]
+
+      @property
+      def poly(self):
+         return Polynomial([Zp(self.c0), Zp(self.c1), Zp(self.c2)])
+
+      @typecheck
+      def __add__(self, other):
+         return trusted((self.c0 + other.c0) % p, (self.c1 + other.c1) % p, (self.c2 + other.c2) % p)
+
+      @typecheck
+      def __sub__(self, other):
+         return trusted((self.c0 - other.c0) % p, (self.c1 - other.c1) % p, (self.c2 - other.c2) % p)
+
+      def __neg__(self):
+         return trusted(-self.c0 % p, -self.c1 % p, -self.c2 % p)
+
+      # Karatsuba-style interpolation: six products, with t^3 = beta
+      @typecheck
+      def __mul__(self, other):
+         if self is other:
+            return self.square()
+
+         a0, a1, a2 = self.c0, self.c1, self.c2
+         b0, b1, b2 = other.c0, other.c1, other.c2
+         v0, v1, v2 = a0 * b0, a1 * b1, a2 * b2
+
+         c0 = v0 + b * ((a1 + a2) * (b1 + b2) - v1 - v2)
+         c1 = (a0 + a1) * (b0 + b1) - v0 - v1 + b * v2
+         c2 = (a0 + a2) * (b0 + b2) - v0 + v1 - v2
+         return trusted(c0 % p, c1 % p, c2 % p)
+
+      # Chung-Hasan squaring (SQR2): five squarings and products
+      def square(self):
+         a0, a1, a2 = self.c0, self.c1, self.c2
+         s0 = a0 * a0
+         s1 = 2 * a0 * a1
+         s2 = (a0 - a1 + a2) * (a0 - a1 + a2)
+         s3 = 2 * a1 * a2
+         s4 = a2 * a2
+         return trusted((s0 + b * s3) % p, (s1 + b * s4) % p, (s1 + s2 + s3 - s0 - s4) % p)
+
+      # the cofactors (t0, t1, t2) with x (t0 + t1 t + t2 t^2) = norm(x)
+      def adjugate(self):
+         a0, a1, a2 = self.c0, self.c1, self.c2
+         return (a0 * a0 - b * a1 * a2, b * a2 * a2 - a0 * a1, a1 * a1 - a0 * a2)
+
+      def norm(self):
+         t0, t1, t2 = self.adjugate()
+         return Zp(self.c0 * t0 + b * (self.c2 * t1 + self.c1 * t2))
+
+      def inverse(self):
+         t0, t1, t2 = self.adjugate()
+         norm = Zp(self.c0 * t0 + b * (self.c2 * t1 + self.c1 * t2))
+         if norm == 0:
+            raise ZeroDivisionError("0 has no inverse in %s" % Fq3.__name__)
+
+         n = int(norm.inverse())
+         return trusted(t0 * n % p, t1 * n % p, t2 * n % p)
+
+      # the k-th power of the Frobenius map, using t^(p^k) = gamma_k t and
+      # t^(2 p^k) = gamma_k^2 t^2
+      def frobenius(self, k=1):
+         gamma, gammaSquared = Fq3.frobeniusCoefficients[k % 3]
+         return trusted(self.c0, self.c1 * gamma % p, self.c2 * gammaSquared % p)
+
+      @typecheck
+      def __eq__(self, other):
+         return isinstance(other, Fq3) and (self.c0, self.c1, self.c2) == (other.c0, other.c1, other.c2)
+
+      @typecheck
+      def __ne__(self, other):
+         return not isinstance(other, Fq3) or (self.c0, self.c1, self.c2) != (other.c0, other.c1, other.c2)
+
+      def __hash__(self):
+         return hash((self.c0, self.c1, self.c2))
+
+      @typecheck
+      def __divmod__(self, divisor):
+         q,r = divmod(self.poly, divisor.poly)
+         return (Fq3(q), Fq3(r))
+
+      def __abs__(self): return abs(self.poly)
+      def __repr__(self): return repr(self.poly) + ' \u2208 ' + self.__class__.__name__
+
+   # gamma_k = beta^((p^k - 1)/3), and beta^((p^2 - 1)/3) = gamma_1^(p + 1)
+   gamma = pow(beta, (p - 1) // 3, p)
+   gammas = [1, gamma, pow(gamma, p + 1, p)]
+
+   Fq3.fieldSize = p ** 3
+   Fq3.primeSubfield = Zp
+   Fq3.idealGenerator = Polynomial([Zp(-beta), Zp(0), Zp(0), Zp(1)])
+   Fq3.beta = beta
+   Fq3.frobeniusCoefficients = [(g, g * g % p) for g in gammas]
+   Fq3.field = Fq3
+   Fq3.__name__ = 'F_{%d^%d}' % (p, 3)
+   return Fq3
@@ -1,61 +1,303 @@
+import json
+import os
 import random
-from .polynomial import polynomialsOver
+from .polynomial import longDivision, multiplyInts, polynomialsOver
 from .modp import *
+from .extension import binomialConstant, findBinomialConstant, QuadraticExtension, CubicExtension
 
 
 
+# For primes of at most this many bits, x^(p^i) is computed from x^(p^(i-1))
+# by powering, which then costs only a few multiplications mod f, rather than
+# with the Frobenius matrix, which costs m multiplications mod f to set up.
+frobeniusMatrixBits = 8
+
+
+# remainderMod: Polynomial, int -> function
+# a function taking a coefficient list of ints to the m ints mod p of its
+# remainder mod f, m = deg f
+def remainderMod(polynomial, p):
+   f = [int(c) for c in polynomial]
+   m = len(f) - 1
+   lcInverse = pow(f[-1], p - 2, p)
+
+   def reduce(a):
+      remainder = longDivision(a, f, lcInverse, 0, p)[1]
+      return [c % p for c in remainder] + [0] * (m - len(remainder))
+
+   return reduce
+
+
+# frobeniusMatrix: [int], int, function -> [[int]]
+# the rows x^(pi) mod f for i < m, as lists of m ints mod p, from the
+# coefficients of x^p mod f and the multiplication mod f. Raising to the p-th
+# power is Z/p-linear on Z/p[x]/(f), since g^p = g(x^p), so with these rows
+# applying it to any g is a linear combination of them instead of a powmod.
+def frobeniusMatrix(xp, m, mulmod):
+   rows = [[1] + [0] * (m - 1)]
+   for _ in range(1, m):
+      rows.append(mulmod(rows[-1], xp))
+
+   return rows
+
+
+# applyFrobenius: [int], [[int]], int -> [int]
+# the coefficients of g^p mod f given those of g and the rows of frobeniusMatrix
+def applyFrobenius(g, rows, p):
+   result = [0] * len(rows)
+   for (c, row) in zip(g, rows):
+      if c:
+         result = [r + c * x for (r, x) in zip(result, row)]
+
+   return [r % p for r in result]
+
+
 # isIrreducible: Polynomial, int -> bool
 # determine if the given monic polynomial with coefficients in Z/p is
 # irreducible over Z/p where p is the given integer
-# Algorithm 4.69 in the Handbook of Applied Cryptography
+# Ben-Or's test: f of degree m is irreducible if and only if it has no
+# common factor with x^(p^i) - x for i <= m/2, and the test stops at the
+# first i that finds one, which for random candidates usually comes early.
+# The powers are computed on coefficient lists of ints: x^p by squaring and
+# shifting, and every further x^(p^i) with the Frobenius matrix.
 def isIrreducible(polynomial, p):
    ZmodP = IntegersModP(p)
    if polynomial.field is not ZmodP:
       raise TypeError("Given a polynomial that's not over %s, but instead %r" %
                         (ZmodP.__name__, polynomial.field.__name__))
 
+   m = polynomial.degree()
+   if m < 2:
+      return True
+
    poly = polynomialsOver(ZmodP).factory
    x = poly([0,1])
-   powerTerm = x
    isUnit = lambda p: p.degree() == 0
 
-   for _ in range(int(polynomial.degree() / 2)):
-      powerTerm = powerTerm.powmod(p, polynomial)
-      gcdOverZmodp = gcd(polynomial, powerTerm - x)
+   reduce = remainderMod(polynomial, p)
+   mulmod = lambda a, b: reduce(multiplyInts(ZmodP, a, b))
+   bits = bin(p)[2:].rstrip('L')
+
+   xp = reduce([0, 1])
+   for bit in bits[1:]:
+      xp = mulmod(xp, xp)
+      if bit == '1':
+         xp = reduce([0] + xp)
+
+   powerTerm, rows = xp, None
+   for i in range(1, m // 2 + 1):
+      if i > 1 and len(bits) <= frobeniusMatrixBits:
+         g = powerTerm
+         for bit in bits[1:]:
+            powerTerm = mulmod(powerTerm, powerTerm)
+            if bit == '1':
+               powerTerm = mulmod(powerTerm, g)
+      elif i > 1:
+         if rows is None:
+            rows = frobeniusMatrix(xp, m, mulmod)
+         powerTerm = applyFrobenius(powerTerm, rows, p)
+
+      gcdOverZmodp = gcd(polynomial, poly(powerTerm) - x)
       if not isUnit(gcdOverZmodp):
          return False
 
    return True
 
 
+# primeFactors: int -> [int]
+def primeFactors(n):
+   factors = []
+   d = 2
+   while d * d <= n:
+      if n % d == 0:
+         factors.append(d)
+         while n % d == 0:
+            n //= d
+      d += 1
+
+   if n > 1:
+      factors.append(n)
+   return factors
+
+
+# The sparse search only tries coefficients among the first few of
+# 1, -1, 2, -2, ... mod p.
+sparseSearchBound = 8
+
+
+# sparseCandidates: int, int -> generator of [int]
+# the coefficient lists (constant term first) of the monic binomials
+# x^m + b and then of the trinomials x^m + a x^k + b for k = 1, ..., m-1, with
+# small a and b. Reducing by a binomial or trinomial only touches one or two
+# coefficients per step, and small coefficients make those steps cheaper.
+# Over Z/2, where some degrees (multiples of 8, for one) have no irreducible
+# trinomials, the pentanomials x^m + x^k3 + x^k2 + x^k1 + 1 follow.
+def sparseCandidates(p, m):
+   constants = []
+   for c in range(1, sparseSearchBound):
+      for residue in (c % p, -c % p):
+         if residue and residue not in constants:
+            constants.append(residue)
+   constants = constants[:sparseSearchBound]
+
+   # x^m + b can only be irreducible if -b is not an r-th power for any
+   # prime r dividing m, and then only if every such r divides p - 1
+   primes = primeFactors(m)
+   if all((p - 1) % r == 0 for r in primes):
+      for b in constants:
+         if all(pow(-b % p, (p - 1) // r, p) != 1 for r in primes):
+            yield [b] + [0] * (m - 1) + [1]
+
+   for k in range(1, m):
+      for b in constants:
+         for a in constants:
+            yield [b] + [0] * (k - 1) + [a] + [0] * (m - k - 1) + [1]
+
+   if p == 2:
+      for k3 in range(3, m):
+         for k2 in range(2, k3):
+            for k1 in range(1, k2):
+               coefficients = [1] + [0] * (m - 1) + [1]
+               coefficients[k1] = coefficients[k2] = coefficients[k3] = 1
+               yield coefficients
+
+
 # generateIrreduciblePolynomial: int, int -> Polynomial
 # generate a random irreducible polynomial of a given degree over Z/p, where p
 # is given by the integer 'modulus'. This algorithm is expected to terminate
 # after 'degree' many irreducilibity tests. By Chernoff bounds the probability
 # it deviates from this by very much is exponentially small.
-def generateIrreduciblePolynomial(modulus, degree):
+# With sparse=True the binomials and trinomials of sparseCandidates are tried
+# first, in order, so the result is the same on every run.
+def generateIrreduciblePolynomial(modulus, degree, sparse=False):
    Zp = IntegersModP(modulus)
    Polynomial = polynomialsOver(Zp)
 
+   if sparse:
+      for coefficients in sparseCandidates(modulus, degree):
+         candidate = Polynomial([Zp(c) for c in coefficients])
+         if isIrreducible(candidate, modulus):
+            return candidate
+
    while True:
       coefficients = [Zp(random.randint(0, modulus-1)) for _ in range(degree)]
       randomMonicPolynomial = Polynomial(coefficients + [Zp(1)])
-      print(randomMonicPolynomial)
 
       if isIrreducible(randomMonicPolynomial, modulus):
          return randomMonicPolynomial
 
 
+# The moduli FiniteField(p, m) picks for itself can be recorded in a JSON
+# file mapping "p,m" to their coefficients, so later runs skip the search.
+# This is off unless the environment variable FINITEFIELD_MODULI names the
+# file; importing the package never writes anywhere by itself.
+moduliPath = os.environ.get('FINITEFIELD_MODULI') or None
+moduli = None
+
+
+# loadModuli: str or None -> dict
+# the moduli recorded in a file, {} if there is none or it can't be read
+def loadModuli(path):
+   if path is None:
+      return {}
+
+   try:
+      with open(path) as f:
+         recorded = json.load(f)
+   except (IOError, OSError, ValueError):
+      return {}
+
+   return recorded if isinstance(recorded, dict) else {}
+
+
+# saveModuli: str or None, dict -> None
+# record the moduli, merged with whatever another process recorded in the
+# meantime. Failing to write the file only loses the cache.
+def saveModuli(path, found):
+   if path is None:
+      return
+
+   recorded = loadModuli(path)
+   recorded.update(found)
+
+   try:
+      directory = os.path.dirname(path)
+      if directory and not os.path.isdir(directory):
+         os.makedirs(directory)
+
+      temporary = '%s.%d.tmp' % (path, os.getpid())
+      with open(temporary, 'w') as f:
+         json.dump(recorded, f, sort_keys=True)
+      os.rename(temporary, path)
+   except (IOError, OSError):
+      pass
+
+
+# irreducibleModulus: int, int -> Polynomial
+# the modulus of FiniteField(p, m) when none is given: the one recorded for
+# (p, m) if it is irreducible, or else the first sparse irreducible
+# polynomial, which is recorded in its place
+def irreducibleModulus(p, m):
+   global moduli
+   if moduli is None:
+      moduli = loadModuli(moduliPath)
+
+   Zp = IntegersModP(p)
+   Polynomial = polynomialsOver(Zp)
+   key = '%d,%d' % (p, m)
+
+   # a recorded modulus is checked before it is trusted: a stale or edited
+   # file would otherwise silently give a ring that isn't a field. The test
+   # costs a fraction of the search it saves.
+   coefficients = moduli.get(key)
+   if (isinstance(coefficients, list) and len(coefficients) == m + 1 and coefficients[-1] == 1
+         and all(type(c) in integerTypes and 0 <= c < p for c in coefficients)):
+      polynomialModulus = Polynomial([Zp(c) for c in coefficients])
+      if isIrreducible(polynomialModulus, p):
+         return polynomialModulus
+
+   polynomialModulus = generateIrreduciblePolynomial(modulus=p, degree=m, sparse=True)
+   moduli[key] = [int(c) for c in polynomialModulus]
+   saveModuli(moduliPath, {key: moduli[key]})
+   return polynomialModulus
+
+
 # create a type constructor for the finite field of order p^m for p prime, m >= 1
+# for m == 1, backend='montgomery' stores the elements in Montgomery form and
+# backend='fast' uses the slotted element class without per-operation typechecks.
+# For m == 2 or 3 with a binomial modulus t^m - beta (given, or the first one
+# that is irreducible when no modulus is given) the elements are those of
+# extension.py; backend='polynomial' keeps the generic Polynomial-based class.
+# Without a modulus the generic class uses irreducibleModulus(p, m).
 @memoize
-def FiniteField(p, m, polynomialModulus=None):
+def FiniteField(p, m, polynomialModulus=None, backend=None):
+   if backend not in (None, 'montgomery', 'fast', 'polynomial'):
+      raise ValueError("Unknown backend %r for the integers mod %d" % (backend, p))
+   if backend in ('montgomery', 'fast') and m != 1:
+      raise ValueError("The %r backend is only available for prime fields" % backend)
+   if backend == 'polynomial' and m == 1:
+      raise ValueError("The 'polynomial' backend is only available for extension fields")
+   if backend == 'montgomery':
+      return MontgomeryIntegersModP(p)
+   if backend == 'fast':
+      return FastIntegersModP(p)
+
    Zp = IntegersModP(p)
    if m == 1:
       return Zp
 
+   if backend is None and m in (2, 3):
+      if polynomialModulus is None:
+         beta = findBinomialConstant(p, m)
+      else:
+         beta = binomialConstant(polynomialModulus, m)
+
+      if beta is not None:
+         return (QuadraticExtension if m == 2 else CubicExtension)(p, beta)
+
    Polynomial = polynomialsOver(Zp)
    if polynomialModulus is None:
-      polynomialModulus = generateIrreduciblePolynomial(modulus=p, degree=m)
+      polynomialModulus = irreducibleModulus(p, m)
 
    class Fq(FieldElement):
       fieldSize = int(p ** m)
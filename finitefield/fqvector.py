@@ -0,0 +1,164 @@
+# Vectors of elements of a prime field Z/p stored as NumPy limb arrays.
+#
+# Each element is split into L limbs of 26 bits (L = 10 for the 255-bit
+# Jubjub base field), and a vector of n elements is an L x n uint64 array, so
+# every limb operation is one NumPy operation over all n elements at once.
+# Products of two limbs fit in 52 bits, which leaves enough headroom in 64
+# bits to accumulate a whole row of partial products without carrying.
+#
+# Multiplication is Montgomery multiplication (separated operand scanning),
+# so elements are kept in Montgomery form aR mod p for R = 2^(26 L), and are
+# only converted in and out by fromInts/toInts.
+#
+# This module needs NumPy, which the rest of the package does not.
+
+import numpy
+
+from .euclidean import extendedEuclideanAlgorithm
+from .numbertype import memoize
+
+radix = 26
+mask = (1 << radix) - 1
+
+
+# split a list of ints (or elements) into an L x n array of 26-bit limbs
+def toLimbs(values, numLimbs):
+   values = numpy.array([int(v) for v in values], dtype=object)
+   limbs = numpy.empty((numLimbs, len(values)), dtype=numpy.uint64)
+   for i in range(numLimbs):
+      limbs[i] = ((values >> (radix * i)) & mask).astype(numpy.uint64)
+   return limbs
+
+
+def fromLimbs(limbs):
+   values = numpy.zeros(limbs.shape[1], dtype=object)
+   for i in range(limbs.shape[0] - 1, -1, -1):
+      values = (values << radix) | limbs[i].astype(object)
+   return [int(v) for v in values]
+
+
+# propagate the carries of a redundant limb array in place, returning the
+# carry out of the top limb
+def carry(t):
+   c = numpy.zeros(t.shape[1], dtype=numpy.uint64)
+   for i in range(t.shape[0]):
+      t[i] += c
+      c = t[i] >> radix
+      t[i] &= mask
+   return c
+
+
+# t - m where t >= m and t elsewhere, for t and m with
+# carried limbs (m may be a column of constant limbs)
+def subtractIfAtLeast(t, m):
+   diff = t.astype(numpy.int64) - m.astype(numpy.int64)
+   borrow = numpy.zeros(t.shape[1], dtype=numpy.int64)
+   for i in range(t.shape[0]):
+      diff[i] -= borrow
+      borrow = (diff[i] < 0).astype(numpy.int64)
+      diff[i] += borrow << radix
+   keep = borrow.astype(bool)
+   return numpy.where(keep, t, diff.astype(numpy.uint64))
+
+
+@memoize
+def vectorsOver(field):
+   p = field.p
+   L = (p.bit_length() + 2 + radix - 1) // radix # so that R = 2^(26 L) > 4p
+   R = 1 << (radix * L)
+
+   P = toLimbs([p], L)                              # p as an L x 1 column
+   pPrime = (-extendedEuclideanAlgorithm(p, 1 << radix)[0]) & mask # -p^{-1} mod 2^26
+   rSquared = R * R % p
+
+   # montgomery: L x n, L x n -> L x n
+   # ab R^{-1} mod p for a, b < p, fully reduced (either operand may also be
+   # a single column, which is broadcast)
+   def montgomery(a, b):
+      n = max(a.shape[1], b.shape[1])
+      t = numpy.zeros((L + 1, n), dtype=numpy.uint64)
+
+      for i in range(L):
+         t[:L] += a[i] * b
+         m = ((t[0] & mask) * numpy.uint64(pPrime)) & mask
+         t[:L] += m * P
+         # now the low limb is divisible by 2^26: shift everything down
+         t[1] += t[0] >> radix
+         t[:L] = t[1:]
+         t[L] = 0
+
+      carry(t[:L])
+      return subtractIfAtLeast(t[:L], P)
+
+
+   class FqVector(object):
+      def __init__(self, limbs):
+         self.limbs = limbs
+
+      @classmethod
+      def fromInts(cls, values):
+         values = [int(v) % p for v in values]
+         return cls(montgomery(toLimbs(values, L), toLimbs([rSquared], L)))
+
+      @classmethod
+      def fromElements(cls, elements):
+         return cls.fromInts(elements)
+
+      def toInts(self):
+         one = numpy.zeros((L, 1), dtype=numpy.uint64)
+         one[0] = 1
+         return fromLimbs(montgomery(self.limbs, one))
+
+      def toElements(self):
+         return [field(v) for v in self.toInts()]
+
+      def __len__(self):
+         return self.limbs.shape[1]
+
+      def __getitem__(self, i):
+         if isinstance(i, slice):
+            return FqVector(self.limbs[:, i])
+         return field(FqVector(self.limbs[:, i:i+1]).toInts()[0])
+
+      # broadcast an int or field element to a vector operand
+      def operand(self, other):
+         if isinstance(other, FqVector):
+            if len(other) != len(self) and len(other) != 1:
+               raise ValueError("Can't combine vectors of lengths %d and %d" % (len(self), len(other)))
+            return other.limbs
+         return FqVector.fromInts([other]).limbs
+
+      def __add__(self, other):
+         t = self.limbs + self.operand(other)
+         carry(t)
+         return FqVector(subtractIfAtLeast(t, P))
+
+      def __sub__(self, other):
+         return self + -FqVector(self.operand(other))
+
+      def __neg__(self):
+         # p - a, which is p for a = 0 and then reduced to 0
+         t = subtractIfAtLeast(numpy.broadcast_to(P, self.limbs.shape).copy(), self.limbs)
+         return FqVector(subtractIfAtLeast(t, P))
+
+      def __mul__(self, other):
+         return FqVector(montgomery(self.limbs, self.operand(other)))
+
+      def __radd__(self, other): return self + other
+      def __rmul__(self, other): return self * other
+      def __rsub__(self, other): return -self + other
+
+      def __eq__(self, other):
+         return isinstance(other, FqVector) and numpy.array_equal(self.limbs, other.limbs)
+
+      def __ne__(self, other):
+         return not self == other
+
+      def __repr__(self):
+         return 'FqVector(%r)' % self.toInts()
+
+   FqVector.field = field
+   FqVector.p = p
+   FqVector.numLimbs = L
+   FqVector.__name__ = 'FqVector(%s)' % field.__name__
+   return FqVector
@@ -1,10 +1,149 @@
 
 from .euclidean import *
 from .numbertype import *
+from .sqrt import SqrtTables, jacobiSymbol
+from .exponentiation import AdditionChain
+
+
+# nativeInverse: int, int -> int
+# the inverse of n mod p by the interpreter's own modular inverse, which
+# pow(n, -1, p) computes from Python 3.8 on; older versions fall back to
+# pow(n, p - 2, p), which is still native code, if not the fastest
+try:
+   pow(2, -1, 3)
+
+   def nativeInverse(n, p):
+      return pow(n, -1, p)
+except (TypeError, ValueError):
+   def nativeInverse(n, p):
+      return pow(n, p - 2, p)
+
+inversionMethods = ('euclid', 'fermat', 'native')
 
 # so all IntegersModP are instances of the same base class
 class _Modular(FieldElement):
-   pass
+   __slots__ = ()
+
+   # how inverse() works: 'euclid' runs the extended Euclidean algorithm on
+   # the ints, 'fermat' raises to the power p - 2 with the field's own
+   # multiplication along a precompiled addition chain, and 'native' uses
+   # nativeInverse above. Change it per field with useInversion.
+   inversion = 'euclid'
+
+   @classmethod
+   def useInversion(cls, method):
+      if method not in inversionMethods:
+         raise ValueError("Unknown inversion method %r, expected one of %s" % (method, inversionMethods))
+      cls.inversion = method
+
+   # the addition chain for the exponent n, compiled on first use and kept
+   # with the field; the one for p - 2 is used by every 'fermat' inversion
+   # (square roots go through SqrtTables and the built-in pow instead)
+   @classmethod
+   def additionChain(cls, n):
+      if '_chains' not in cls.__dict__:
+         cls._chains = {}
+      if n not in cls._chains:
+         cls._chains[n] = AdditionChain(n)
+      return cls._chains[n]
+
+   def inverse(self):
+      n = int(self)
+      if n == 0:
+         raise ZeroDivisionError("0 has no inverse in %s" % self.__class__.__name__)
+
+      if self.inversion == 'fermat':
+         return self.additionChain(self.p - 2)(self)
+      if self.inversion == 'native':
+         return self.__class__(nativeInverse(n, self.p))
+
+      # need to use the division algorithm *as integers* because we're
+      # doing it on the modulus itself (which would otherwise be zero)
+      x,y,d = extendedEuclideanAlgorithm(n, self.p)
+
+      if d != 1:
+         raise Exception("Error: p is not prime in %s!" % (self.__class__.__name__))
+
+      return self.__class__(x)
+
+   # batch_inverse: [element] -> [element]
+   # Montgomery's trick: invert all of the given elements with a single
+   # inversion and 3(N-1) multiplications. Zero entries raise a
+   # ZeroDivisionError naming their positions, unless ignoreZeros is set, in
+   # which case they are left out of the product and returned as zero.
+   @classmethod
+   def batch_inverse(cls, elements, ignoreZeros=False):
+      elements = [x if type(x) is cls else cls(x) for x in elements]
+      zero = cls(0)
+
+      isZero = [int(x) == 0 for x in elements]
+      if any(isZero) and not ignoreZeros:
+         zeros = [i for i in range(len(elements)) if isZero[i]]
+         raise ZeroDivisionError("Can't invert the zero entries at positions %s" % zeros)
+
+      # before[i] is the product of the nonzero elements preceding position i
+      before = []
+      product = None
+      for x, xIsZero in zip(elements, isZero):
+         before.append(product)
+         if not xIsZero:
+            product = x if product is None else product * x
+
+      result = [zero] * len(elements)
+      if product is None:
+         return result
+
+      inverse = product.inverse() # the inverse of everything up to position i
+      for i in range(len(elements) - 1, -1, -1):
+         if isZero[i]:
+            continue
+
+         if before[i] is None:
+            result[i] = inverse
+         else:
+            result[i] = inverse * before[i]
+            inverse = inverse * elements[i]
+
+      return result
+
+
+   # the square root tables for this field, built on first use
+   @classmethod
+   def sqrtTables(cls):
+      if '_sqrtTables' not in cls.__dict__:
+         cls._sqrtTables = SqrtTables(cls.p)
+      return cls._sqrtTables
+
+   # build the per-field constants that are otherwise built on first use:
+   # the square root tables and the addition chain for inversion by p - 2.
+   # They are kept with the class, and so for as long as the constructor
+   # cache keeps the field.
+   @classmethod
+   def precompute(cls):
+      tables = cls.sqrtTables()
+      for i, (offset, width) in enumerate(tables.windows):
+         tables.inversePowers(max(offset - 1, 0))
+         for (jOffset, _) in tables.windows[:i]:
+            tables.inversePowers(jOffset + tables.s - offset - width)
+
+      cls.additionChain(cls.p - 2)
+      return cls
+
+   # the Legendre symbol: 1 for nonzero squares, -1 for non-squares, 0 for zero
+   def legendre(self):
+      return jacobiSymbol(int(self), self.p)
+
+   def is_square(self):
+      return self.legendre() != -1
+
+   # a square root of this element (table-based Tonelli-Shanks, see sqrt.py);
+   # the other one is its negative
+   def sqrt(self):
+      root = self.sqrtTables().sqrt(int(self))
+      if root is None:
+         raise ValueError("%s is not a square in %s" % (self, self.__class__.__name__))
+
+      return self.__class__(root)
 
 
 @memoize
@@ -48,16 +187,6 @@ def IntegersModP(p):
          q,r = divmod(self.n, divisor.n)
          return (IntegerModP(q), IntegerModP(r))
 
-      def inverse(self):
-         # need to use the division algorithm *as integers* because we're
-         # doing it on the modulus itself (which would otherwise be zero)
-         x,y,d = extendedEuclideanAlgorithm(self.n, self.p)
-
-         if d != 1:
-            raise Exception("Error: p is not prime in %s!" % (self.__name__))
-
-         return IntegerModP(x)
-
       def __abs__(self):
          return abs(self.n)
 
@@ -76,5 +205,231 @@ def IntegersModP(p):
    return IntegerModP
 
 
+# the same field, but with every element n stored in Montgomery form nR mod p
+# for R = 2^k the first power of 2^64 above p. Products are reduced with REDC,
+# which only needs shifts and masks by R instead of a division by p, and
+# elements are only converted back to ordinary integers by int() and str().
+@memoize
+def MontgomeryIntegersModP(p):
+   # assume p is an odd prime
+
+   k = 64 * ((p.bit_length() + 63) // 64)
+   R = 1 << k
+   mask = R - 1
+   pPrime = (-extendedEuclideanAlgorithm(p, R)[0]) % R # -p^{-1} mod R
+   rSquared = R * R % p
+
+   # REDC: given 0 <= t < pR, compute tR^{-1} mod p
+   def redc(t):
+      u = (t + ((t * pPrime) & mask) * p) >> k
+      return u - p if u >= p else u
+
+   class MontgomeryIntegerModP(_Modular):
+      def __init__(self, n):
+         try:
+            self.m = redc((int(n) % p) * rSquared)
+         except:
+            raise TypeError("Can't cast type %s to %s in __init__" % (type(n).__name__, type(self).__name__))
+
+         self.field = MontgomeryIntegerModP
+
+      # build an element directly from its Montgomery form 0 <= m < p
+      @classmethod
+      def fromMontgomery(cls, m):
+         element = cls.__new__(cls)
+         element.m = m
+         element.field = cls
+         return element
+
+      @property
+      def n(self):
+         return redc(self.m)
+
+      @typecheck
+      def __add__(self, other):
+         m = self.m + other.m
+         return MontgomeryIntegerModP.fromMontgomery(m - p if m >= p else m)
+
+      @typecheck
+      def __sub__(self, other):
+         m = self.m - other.m
+         return MontgomeryIntegerModP.fromMontgomery(m + p if m < 0 else m)
+
+      @typecheck
+      def __mul__(self, other):
+         return MontgomeryIntegerModP.fromMontgomery(redc(self.m * other.m))
+
+      def __neg__(self):
+         return MontgomeryIntegerModP.fromMontgomery(p - self.m if self.m else 0)
+
+      @typecheck
+      def __eq__(self, other):
+         return isinstance(other, MontgomeryIntegerModP) and self.m == other.m
+
+      @typecheck
+      def __ne__(self, other):
+         return isinstance(other, MontgomeryIntegerModP) is False or self.m != other.m
+
+      @typecheck
+      def __divmod__(self, divisor):
+         q,r = divmod(self.n, divisor.n)
+         return (MontgomeryIntegerModP(q), MontgomeryIntegerModP(r))
+
+      def __abs__(self):
+         return abs(self.n)
+
+      def __str__(self):
+         return str(self.n)
+
+      def __repr__(self):
+         return '%d (mod %d)' % (self.n, self.p)
+
+      def __int__(self):
+         return self.n
+
+   MontgomeryIntegerModP.p = p
+   MontgomeryIntegerModP.R = R
+   MontgomeryIntegerModP.k = k
+   MontgomeryIntegerModP.pPrime = pPrime
+   MontgomeryIntegerModP.rSquared = rSquared
+   MontgomeryIntegerModP.__name__ = 'Z/%d' % (p)
+   MontgomeryIntegerModP.englishName = 'MontgomeryIntegersMod%d' % (p)
+   return MontgomeryIntegerModP
+
+
+# the same field with a leaner element: the value lives in a slot, results
+# of arithmetic are built without re-reducing or re-checking them, and ints
+# are used directly instead of going through the typecheck decorator
+@memoize
+def FastIntegersModP(p):
+   # assume p is prime
+
+   new = object.__new__
+
+   # build an element from a value already reduced into [0, p)
+   def trusted(n):
+      element = new(FastIntegerModP)
+      element.n = n
+      return element
+
+   # the typecheck decorator's rules for operands that are neither
+   # elements of this field nor ints
+   def cast(other, operation):
+      if (hasattr(other.__class__, 'operatorPrecedence') and
+            other.__class__.operatorPrecedence > FastIntegerModP.operatorPrecedence):
+         return NotImplemented
+
+      try:
+         return FastIntegerModP(other)
+      except TypeError:
+         message = 'Not able to typecast %s of type %s to type %s in function %s'
+         raise TypeError(message % (other, type(other).__name__, FastIntegerModP.__name__, operation))
+
+   class FastIntegerModP(_Modular):
+      __slots__ = ('n',)
+
+      def __init__(self, n):
+         try:
+            self.n = int(n) % p
+         except:
+            raise TypeError("Can't cast type %s to %s in __init__" % (type(n).__name__, type(self).__name__))
+
+      def __add__(self, other):
+         if type(other) is FastIntegerModP:
+            n = self.n + other.n
+            return trusted(n - p if n >= p else n)
+         if isinstance(other, integerTypes):
+            return trusted((self.n + other) % p)
+
+         other = cast(other, '__add__')
+         return other if other is NotImplemented else self + other
+
+      def __sub__(self, other):
+         if type(other) is FastIntegerModP:
+            n = self.n - other.n
+            return trusted(n + p if n < 0 else n)
+         if isinstance(other, integerTypes):
+            return trusted((self.n - other) % p)
+
+         other = cast(other, '__sub__')
+         return other if other is NotImplemented else self - other
+
+      def __mul__(self, other):
+         if type(other) is FastIntegerModP:
+            return trusted(self.n * other.n % p)
+         if isinstance(other, integerTypes):
+            return trusted(self.n * other % p)
+
+         other = cast(other, '__mul__')
+         return other if other is NotImplemented else self * other
+
+      def __radd__(self, other): return self + other
+      def __rmul__(self, other): return self * other
+
+      def __rsub__(self, other):
+         if isinstance(other, integerTypes):
+            return trusted((other - self.n) % p)
+         return -self + other
+
+      def __neg__(self):
+         return trusted(p - self.n if self.n else 0)
+
+      def __pow__(self, n):
+         if type(n) not in integerTypes:
+            raise TypeError
+         if n < 0:
+            return self.inverse() ** -n
+
+         return trusted(pow(self.n, n, p))
+
+      def __eq__(self, other):
+         if type(other) is FastIntegerModP:
+            return self.n == other.n
+         if isinstance(other, integerTypes):
+            return self.n == other % p
+
+         other = cast(other, '__eq__')
+         return other if other is NotImplemented else self == other
+
+      def __ne__(self, other):
+         result = self == other
+         return result if result is NotImplemented else not result
+
+      def __hash__(self):
+         return hash(self.n)
+
+      def __truediv__(self, other):
+         if isinstance(other, integerTypes):
+            other = FastIntegerModP(other)
+         return self * other.inverse()
+
+      def __divmod__(self, divisor):
+         if type(divisor) is not FastIntegerModP:
+            divisor = FastIntegerModP(divisor)
+
+         q,r = divmod(self.n, divisor.n)
+         return (trusted(q), trusted(r))
+
+      def __abs__(self):
+         return abs(self.n)
+
+      def __str__(self):
+         return str(self.n)
+
+      def __repr__(self):
+         return '%d (mod %d)' % (self.n, p)
+
+      def __int__(self):
+         return self.n
+
+   FastIntegerModP.p = p
+   FastIntegerModP.field = FastIntegerModP
+   FastIntegerModP.__name__ = 'Z/%d' % (p)
+   FastIntegerModP.englishName = 'FastIntegersMod%d' % (p)
+   return FastIntegerModP
+
+
 if __name__ == "__main__":
    mod7 = IntegersModP(7)
+   montgomery7 = MontgomeryIntegersModP(7)
+   fast7 = FastIntegersModP(7)
@@ -0,0 +1,147 @@
+# Number-theoretic transforms over prime fields Z/p, on lists of plain ints.
+#
+# If 2^k divides p - 1, the field has a primitive 2^k-th root of unity w, and
+# evaluating a polynomial at the powers of w (the NTT) turns multiplication of
+# polynomials of degree below 2^(k-1) into pointwise multiplication of their
+# values. The Jubjub base field has 2-adicity 32, so products of degree up to
+# 2^32 can be computed this way in O(n log n) field operations.
+
+from .numbertype import memoize
+
+
+# twoAdicity: int -> int
+# the largest s such that 2^s divides p - 1
+def twoAdicity(p):
+   return ((p - 1) & -(p - 1)).bit_length() - 1
+
+
+# nonSquare: field -> int
+# the smallest z >= 2 which is not a square in a prime field
+@memoize(maxsize=256)
+def nonSquare(field):
+   z = 2
+   while field(z).is_square():
+      z += 1
+
+   return z
+
+
+# twoAdicGenerator: field -> int, int
+# s = twoAdicity(p) and a generator g of the 2^s-th roots of unity of a prime
+# field, g = z^((p-1)/2^s) for the first non-square z
+@memoize(maxsize=256)
+def twoAdicGenerator(field):
+   p = field.p
+   s = twoAdicity(p)
+   return s, pow(nonSquare(field), (p - 1) >> s, p)
+
+
+# rootOfUnity: field, int -> int
+# a primitive n-th root of unity for n a power of two
+def rootOfUnity(field, n):
+   s, g = twoAdicGenerator(field)
+   k = n.bit_length() - 1
+   if n != 1 << k:
+      raise ValueError("Only roots of unity of power of two orders are supported, not %d" % n)
+   if k > s:
+      raise ValueError("%s has no root of unity of order 2^%d (its 2-adicity is %d)" % (field.__name__, k, s))
+
+   return pow(g, 1 << (s - k), field.p)
+
+
+# bitReverse: [any] -> None
+# permute a list of power of two length into bit-reversed index order
+def bitReverse(values):
+   n = len(values)
+   j = 0
+   for i in range(1, n):
+      bit = n >> 1
+      while j & bit:
+         j ^= bit
+         bit >>= 1
+      j |= bit
+
+      if i < j:
+         values[i], values[j] = values[j], values[i]
+
+
+# powers: int, int, int -> [int]
+# [1, x, x^2, ..., x^(n-1)] mod p
+def powers(x, n, p):
+   result = [1] * n
+   for i in range(1, n):
+      result[i] = result[i - 1] * x % p
+   return result
+
+
+# ntt: [int], int, int -> None
+# the in-place iterative radix-2 transform of values (of power of two length
+# n, entries reduced mod p) at the powers of the primitive n-th root of unity
+# root: afterwards values[i] is the polynomial evaluated at root^i
+def ntt(values, root, p):
+   butterflies(values, powers(root, len(values) >> 1, p), p)
+
+
+# butterflies: [int], [int], int -> None
+# the same transform given the twiddle factors root^i for i < n/2; the
+# factors of every stage are a stride through them
+def butterflies(values, twiddles, p):
+   n = len(values)
+   bitReverse(values)
+
+   length = 2
+   while length <= n:
+      half = length >> 1
+      stageTwiddles = twiddles[::n // length][:half]
+
+      for start in range(0, n, length):
+         for k in range(half):
+            i = start + k
+            u, v = values[i], values[i + half] * stageTwiddles[k] % p
+            values[i] = u + v if u + v < p else u + v - p
+            values[i + half] = u - v if u >= v else u - v + p
+
+      length <<= 1
+
+
+# inverseNtt: [int], int, int -> None
+# undo ntt(values, root, p) in place
+def inverseNtt(values, root, p):
+   n = len(values)
+   ntt(values, pow(root, p - 2, p), p)
+
+   nInverse = pow(n, p - 2, p)
+   for i in range(n):
+      values[i] = values[i] * nInverse % p
+
+
+# nttSize: field, int -> int or None
+# the transform length for a product with the given number of coefficients,
+# or None if the field has no root of unity of that order
+def nttSize(field, count):
+   n = 1
+   while n < count:
+      n <<= 1
+
+   if n.bit_length() - 1 > twoAdicity(field.p):
+      return None
+   return n
+
+
+# nttMultiply: field, [int], [int] -> [int]
+# the coefficients of the product of two nonzero polynomials given by their
+# coefficients as ints mod p, low degree first
+def nttMultiply(field, a, b):
+   p = field.p
+   count = len(a) + len(b) - 1
+   n = nttSize(field, count)
+   root = rootOfUnity(field, n)
+
+   a = [x % p for x in a] + [0] * (n - len(a))
+   b = [x % p for x in b] + [0] * (n - len(b))
+   ntt(a, root, p)
+   ntt(b, root, p)
+
+   product = [x * y % p for (x, y) in zip(a, b)]
+   inverseNtt(product, root, p)
+   return product[:count]
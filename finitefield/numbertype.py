@@ -1,19 +1,147 @@
+import collections
+import inspect
+
+from .exponentiation import AdditionChain
+
+# the built-in integer types; Python 2 promotes large values to long
+try:
+   integerTypes = (int, long)
+except NameError:
+   integerTypes = (int,)
+
+
+# the parameter names of a function, and the defaults of the trailing ones
+def parameters(f):
+   try:
+      spec = inspect.getfullargspec(f)
+   except AttributeError:
+      spec = inspect.getargspec(f)
+
+   defaults = spec.defaults or ()
+   return spec.args, dict(zip(spec.args[len(spec.args) - len(defaults):], defaults))
+
+
+# cacheKey: any -> hashable
+# the key an argument is cached under: elements (such as Polynomial moduli,
+# which Python 3 can't hash and Python 2 hashes by identity) by their class
+# and value, so that equal arguments share an entry, and anything else as it is
+def cacheKey(value):
+   if isinstance(value, DomainElement):
+      return (type(value), repr(value))
+   if type(value) in (list, tuple):
+      return tuple(cacheKey(x) for x in value)
+   return value
+
+
+# The cache of one memoized function: the most recently used maxsize
+# results (all of them for maxsize None), keyed by the values of all the
+# parameters, defaults included, however they were passed. The class
+# factories keep everything, since a field must stay the same class for as
+# long as it is used; only caches of plain values may set a bound.
+class Registry(object):
+   def __init__(self, f, maxsize=None):
+      self.f = f
+      self.name = '%s.%s' % (f.__module__, f.__name__)
+      self.names, self.defaults = parameters(f)
+      self.maxsize = maxsize
+      self.cache = collections.OrderedDict()
+      self.hits = self.misses = self.evictions = 0
+
+   # the key for a call, or None if its arguments don't bind to the
+   # parameters (the call itself then raises the TypeError)
+   def key(self, args, kwargs):
+      if not kwargs and len(args) == len(self.names):
+         return tuple(cacheKey(x) for x in args)
+      if len(args) > len(self.names):
+         return None
+
+      values = dict(zip(self.names, args))
+      for name, value in kwargs.items():
+         if name in values or name not in self.names:
+            return None
+         values[name] = value
+
+      for name in self.names[len(args):]:
+         if name not in values:
+            if name not in self.defaults:
+               return None
+            values[name] = self.defaults[name]
+
+      return tuple(cacheKey(values[name]) for name in self.names)
+
+   def __call__(self, *args, **kwargs):
+      key = self.key(args, kwargs)
+      try:
+         result = self.cache.pop(key)
+      except KeyError:
+         pass
+      except TypeError: # an unhashable argument
+         self.misses += 1
+         return self.f(*args, **kwargs)
+      else:
+         self.hits += 1
+         self.cache[key] = result
+         return result
+
+      self.misses += 1
+      result = self.f(*args, **kwargs)
+      if key is not None:
+         self.cache[key] = result
+         while self.maxsize is not None and len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+
+      return result
+
+   def info(self):
+      return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+              'size': len(self.cache), 'maxsize': self.maxsize}
+
+   def clear(self):
+      self.cache.clear()
+      self.hits = self.misses = self.evictions = 0
+
+
+# the registry of every memoized constructor, by module and name
+registries = {}
+
+
 # memoize calls to the class constructors for fields
 # this helps typechecking by never creating two separate
-# instances of a number class.
-def memoize(f):
-   cache = {}
+# instances of a number class. Use as @memoize, which never evicts, or as
+# @memoize(maxsize=n) to bound a cache of values that can be recomputed.
+def memoize(f=None, maxsize=None):
+   if f is None:
+      return lambda f: memoize(f, maxsize)
+
+   registry = Registry(f, maxsize)
+   registries[registry.name] = registry
 
    def memoizedFunction(*args, **kwargs):
-      argTuple = args + tuple(kwargs)
-      if argTuple not in cache:
-         cache[argTuple] = f(*args, **kwargs)
-      return cache[argTuple]
+      return registry(*args, **kwargs)
 
-   memoizedFunction.cache = cache
+   memoizedFunction.__name__ = f.__name__
+   memoizedFunction.__doc__ = f.__doc__
+   memoizedFunction.registry = registry
+   memoizedFunction.cache = registry.cache
    return memoizedFunction
 
 
+# cacheInfo: -> {str: dict}
+# the hits, misses, evictions, size and bound of every constructor cache
+def cacheInfo():
+   return dict((name, registry.info()) for (name, registry) in registries.items())
+
+
+# additionChain: int -> AdditionChain
+# the compiled chain for the exponent n, shared by every element that is
+# raised to it. The exponents come from callers, so only the most recently
+# used ones are kept.
+@memoize(maxsize=64)
+def additionChain(n):
+   return AdditionChain(n)
+
+
 # type check a binary operation, and silently typecast 0 or 1
 def typecheck(f):
    def newF(self, other):
@@ -41,6 +169,7 @@ def typecheck(f):
 # the binary operations finally, the __init__ must operate when given a single
 # argument, provided that argument is the int zero or one
 class DomainElement(object):
+   __slots__ = ()
    operatorPrecedence = 1
 
    # the 'r'-operators are only used when typecasting ints
@@ -48,51 +177,43 @@ class DomainElement(object):
    def __rsub__(self, other): return -self + other
    def __rmul__(self, other): return self * other
 
-   # square-and-multiply algorithm for fast exponentiation
+   # sliding-window exponentiation (see exponentiation.py), with the chain
+   # for each exponent compiled once and cached by additionChain
    def __pow__(self, n):
-      if type(n) not in (int,long):
+      if type(n) not in integerTypes:
          raise TypeError
+      if n < 0:
+         raise ValueError("Can't raise %s to the negative power %d" % (self, n))
+      if n == 0:
+         return self.__class__(1)
 
-      Q = self
-      R = self if n & 1 else self.__class__(1)
-
-      i = 2
-      while i <= n:
-         Q = (Q * Q)
-
-         if n & i == i:
-            R = (Q * R)
-
-         i = i << 1
-
-      return R
+      return additionChain(n)(self)
 
 
    # requires the additional % operator (i.e. a Euclidean Domain)
    def powmod(self, n, modulus):
-      if type(n) not in (int,long):
+      if type(n) not in integerTypes:
          raise TypeError
+      if n < 0:
+         raise ValueError("Can't raise %s to the negative power %d" % (self, n))
+      if n == 0:
+         return self.__class__(1)
 
-      Q = self
-      R = self if n & 1 else self.__class__(1)
-
-      i = 2
-      while i <= n:
-         Q = (Q * Q) % modulus
-
-         if n & i == i:
-            R = (Q * R) % modulus
-
-         i = i << 1
-
-      return R
+      return additionChain(n)(self, modulus)
 
 
 
 # additionally require inverse() on subclasses
 class FieldElement(DomainElement):
+   __slots__ = ()
+
    def __truediv__(self, other): return self * other.inverse()
    def __rtruediv__(self, other): return self.inverse() * other
    def __div__(self, other): return self.__truediv__(other)
    def __rdiv__(self, other): return self.__rtruediv__(other)
 
+   def __pow__(self, n):
+      if type(n) in integerTypes and n < 0:
+         return DomainElement.__pow__(self.inverse(), -n)
+      return DomainElement.__pow__(self, n)
+
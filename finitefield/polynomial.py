@@ -5,6 +5,7 @@ except ImportError:
 import fractions
 
 from .numbertype import *
+from .ntt import nttMultiply, nttSize
 
 # strip all copies of elt from the end of the list
 def strip(L, elt):
@@ -17,6 +18,149 @@ def strip(L, elt):
    return L[:i+1]
 
 
+# The crossover points of the multiplication algorithms, in the number of
+# coefficients of the shorter factor: schoolbook below karatsubaThreshold,
+# Karatsuba from there, and over prime fields with enough roots of unity the
+# NTT from nttThreshold on.
+karatsubaThreshold = 32
+nttThreshold = 256
+
+
+# schoolbook: [any], [any], any -> [any]
+# the coefficients of the product of two nonempty coefficient lists
+def schoolbook(a, b, zero):
+   product = [zero] * (len(a) + len(b) - 1)
+
+   for i,x in enumerate(a):
+      for j,y in enumerate(b):
+         product[i+j] += x*y
+
+   return product
+
+
+# karatsuba: [any], [any], any -> [any]
+# the same product by Karatsuba's method: with a = a0 + a1 t^m and
+# b = b0 + b1 t^m, ab = a0 b0 + ((a0 + a1)(b0 + b1) - a0 b0 - a1 b1) t^m +
+# a1 b1 t^2m, three half-size products instead of four
+def karatsuba(a, b, zero):
+   if min(len(a), len(b)) < karatsubaThreshold:
+      return schoolbook(a, b, zero)
+
+   m = max(len(a), len(b)) // 2
+   if len(a) <= m or len(b) <= m:
+      # one factor is much shorter: split only the longer one
+      if len(a) < len(b):
+         a, b = b, a
+
+      low, high = karatsuba(a[:m], b, zero), karatsuba(a[m:], b, zero)
+      product = low + [zero] * (len(a) + len(b) - 1 - len(low))
+      for i,x in enumerate(high):
+         product[i+m] += x
+      return product
+
+   a0, a1, b0, b1 = a[:m], a[m:], b[:m], b[m:]
+   low = karatsuba(a0, b0, zero)
+   high = karatsuba(a1, b1, zero)
+   middle = karatsuba([x + y for (x, y) in zip_longest(a0, a1, fillvalue=zero)],
+                      [x + y for (x, y) in zip_longest(b0, b1, fillvalue=zero)], zero)
+
+   product = [zero] * (len(a) + len(b) - 1)
+   for i,x in enumerate(low):
+      product[i] += x
+      middle[i] -= x
+   for i,x in enumerate(high):
+      product[i + 2*m] += x
+      middle[i] -= x
+   for i,x in enumerate(middle[:len(product) - m]):
+      product[i + m] += x
+
+   return product
+
+
+# multiplyInts: field, [int], [int] -> [int]
+# the product of two nonempty coefficient lists of ints over the prime field,
+# by whichever of the methods above suits their size; the result is not
+# necessarily reduced mod p
+def multiplyInts(field, a, b):
+   shorter = min(len(a), len(b))
+   if shorter >= nttThreshold and nttSize(field, len(a) + len(b) - 1):
+      return nttMultiply(field, a, b)
+   if shorter >= karatsubaThreshold:
+      return karatsuba(a, b, 0)
+   return schoolbook(a, b, 0)
+
+
+# Division by a divisor of degree m with a quotient of k coefficients takes
+# about km operations by long division. From newtonThreshold on (for both k
+# and m) it is done over Z/p with a reciprocal instead: with rev(f) the
+# coefficients of f in reverse order, rev(quotient) is rev(dividend) times the
+# inverse of rev(divisor) as power series mod t^k, and that inverse comes from
+# Newton's iteration g <- g (2 - rev(divisor) g), which doubles its precision
+# with every step, in O(M(k)) operations.
+newtonThreshold = 256
+
+
+# longDivision: [any], [any], any, any -> [any], [any]
+# the quotient and remainder coefficients of a divided by b (degree m, with
+# the given inverse of its leading coefficient) by schoolbook long division.
+# The dividend's coefficient list is copied once and reduced in place, with
+# no intermediate polynomials; for ints, only the coefficients that become
+# quotient digits are reduced mod p along the way. Only the nonzero terms of
+# the divisor are subtracted, so dividing by a sparse modulus is cheap.
+def longDivision(a, b, lcInverse, zero, p=None):
+   m = len(b) - 1
+   remainder = list(a)
+   quotient = [zero] * (len(a) - m)
+   terms = [(j, c) for (j, c) in enumerate(b[:m]) if c != zero]
+
+   for i in range(len(a) - 1, m - 1, -1):
+      if p is None:
+         coefficient = remainder[i] * lcInverse
+      else:
+         coefficient = remainder[i] % p * lcInverse % p
+      quotient[i - m] = coefficient
+
+      if coefficient != zero:
+         for (j, c) in terms:
+            remainder[i - m + j] -= coefficient * c
+
+   return quotient, remainder[:m]
+
+
+# Below subproductThreshold points, evaluate_many and interpolate work point
+# by point with Horner's rule instead of with subproduct trees.
+subproductThreshold = 256
+
+
+# subproductTree: Polynomial class, [element] -> [[Polynomial]]
+# the levels of the subproduct tree of the points x_i: the linear factors
+# t - x_i at the bottom, and on every level above them the products of
+# adjacent pairs (an odd one out is carried up as it is), up to the single
+# product of all the factors at the top
+def subproductTree(Polynomial, points):
+   one = Polynomial.field(1)
+   level = [Polynomial([-x, one]) for x in points]
+   tree = [level]
+
+   while len(level) > 1:
+      level = [level[i] * level[i+1] if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)]
+      tree.append(level)
+
+   return tree
+
+
+# remainderTree: Polynomial, [[Polynomial]] -> [element]
+# the values of f at the points of a subproduct tree, by reducing f modulo
+# the nodes on the way down: f mod (t - x_i) = f(x_i)
+def remainderTree(f, tree):
+   remainders = [f % tree[-1][0]]
+   for level in reversed(tree[:-1]):
+      remainders = [remainders[i >> 1] % node for i, node in enumerate(level)]
+
+   zero = f.field(0)
+   return [r.coefficients[0] if r.coefficients else zero for r in remainders]
+
+
 # create a polynomial with coefficients in a field; coefficients are in
 # increasing order of monomial degree so that, for example, [1,2,3]
 # corresponds to 1 + 2x + 3x^2
@@ -83,30 +227,137 @@ def polynomialsOver(field=fractions.Fraction):
          if self.isZero() or other.isZero():
             return Zero()
 
-         newCoeffs = [self.field(0) for _ in range(len(self) + len(other) - 1)]
+         shorter = min(len(self), len(other))
+         if not hasattr(field, 'p'):
+            if shorter < karatsubaThreshold:
+               return Polynomial(schoolbook(self.coefficients, other.coefficients, field(0)))
+            return Polynomial(karatsuba(self.coefficients, other.coefficients, field(0)))
+
+         # over Z/p, multiply the coefficients as plain ints and reduce
+         # them once at the end
+         newCoeffs = multiplyInts(field, [int(x) for x in self], [int(x) for x in other])
+         return Polynomial([field(x) for x in newCoeffs])
+
+
+      # evaluate at x with Horner's rule (as ints over Z/p)
+      def __call__(self, x):
+         if hasattr(field, 'p'):
+            p, x, result = field.p, int(x), 0
+            for c in reversed(self.coefficients):
+               result = (result * x + int(c)) % p
+            return field(result)
+
+         result = field(0)
+         for c in reversed(self.coefficients):
+            result = result * x + c
+         return result
+
+
+      def derivative(self):
+         return Polynomial([c * i for i, c in enumerate(self.coefficients)][1:])
+
+
+      # evaluate_many: [element] -> [element]
+      # the values at all of the given points, from the remainders of this
+      # polynomial down their subproduct tree; with fast multiplication and
+      # division that takes O(M(n) log n) operations for n points instead of
+      # the n^2 of Horner's rule
+      def evaluate_many(self, points):
+         points = [x if isinstance(x, field) else field(x) for x in points]
+         if len(points) < subproductThreshold:
+            return [self(x) for x in points]
 
-         for i,a in enumerate(self):
-            for j,b in enumerate(other):
-               newCoeffs[i+j] += a*b
+         return remainderTree(self, subproductTree(Polynomial, points))
 
-         return Polynomial(newCoeffs)
+
+      # interpolate: [element], [element] -> Polynomial
+      # the polynomial of degree below n through the n points (x_i, y_i),
+      # for distinct x_i. With M the product of the t - x_i, it is the sum of
+      # y_i / M'(x_i) M / (t - x_i), which is summed up the subproduct tree.
+      @classmethod
+      def interpolate(cls, xs, ys):
+         xs = [x if isinstance(x, field) else field(x) for x in xs]
+         ys = [y if isinstance(y, field) else field(y) for y in ys]
+         if len(xs) != len(ys):
+            raise ValueError("Got %d x coordinates but %d y coordinates" % (len(xs), len(ys)))
+         if not xs:
+            return Zero()
+
+         tree = subproductTree(Polynomial, xs)
+         derivative = tree[-1][0].derivative()
+         if len(xs) < subproductThreshold:
+            derivatives = [derivative(x) for x in xs]
+         else:
+            derivatives = remainderTree(derivative, tree)
+
+         try:
+            if hasattr(field, 'batch_inverse'):
+               inverses = field.batch_inverse(derivatives)
+            else:
+               inverses = [field(1) / d for d in derivatives]
+         except ZeroDivisionError:
+            raise ValueError("The interpolation points must be distinct")
+
+         sums = [Polynomial([y * w]) for (y, w) in zip(ys, inverses)]
+         for level in tree[:-1]:
+            sums = [sums[i] * level[i+1] + sums[i+1] * level[i] if i + 1 < len(level) else sums[i]
+                      for i in range(0, len(level), 2)]
+
+         return sums[0]
+
+
+      # reciprocal: int -> [int]
+      # the first k coefficients of the inverse of rev(self) as a power
+      # series over Z/p, by Newton's iteration (see newtonThreshold). The
+      # result is kept with the polynomial, so dividing by the same modulus
+      # again (an ideal generator, a node of a subproduct tree) only extends
+      # it if more precision is needed.
+      def reciprocal(self, k):
+         p = field.p
+         cached = self.__dict__.get('reciprocalCache')
+         if cached is not None and len(cached) >= k:
+            return cached[:k]
+
+         f = [int(c) for c in reversed(self.coefficients)]
+         g = cached or [int(field(f[0]).inverse())]
+         while len(g) < k:
+            precision = min(2 * len(g), k)
+            e = [-c % p for c in multiplyInts(field, f[:precision], g)[:precision]]
+            e[0] = (e[0] + 2) % p
+            g = [c % p for c in multiplyInts(field, g, e)[:precision]]
+
+         self.reciprocalCache = g
+         return g
 
 
       @typecheck
       def __divmod__(self, divisor):
-         quotient, remainder = Zero(), self
-         divisorDeg = divisor.degree()
-         divisorLC = divisor.leadingCoefficient()
+         if divisor.isZero():
+            raise ZeroDivisionError
+
+         m = divisor.degree()
+         k = len(self) - m
+         if k <= 0:
+            return Zero(), self
 
-         while remainder.degree() >= divisorDeg:
-            monomialExponent = remainder.degree() - divisorDeg
-            monomialZeros = [self.field(0) for _ in range(monomialExponent)]
-            monomialDivisor = Polynomial(monomialZeros + [remainder.leadingCoefficient() / divisorLC])
+         if not hasattr(field, 'p'):
+            lcInverse = field(1) / divisor.leadingCoefficient()
+            quotient, remainder = longDivision(self.coefficients, divisor.coefficients, lcInverse, field(0))
+            return Polynomial(quotient), Polynomial(remainder)
 
-            quotient += monomialDivisor
-            remainder -= monomialDivisor * divisor
+         p = field.p
+         a, b = [int(c) for c in self], [int(c) for c in divisor]
+
+         if min(k, m) < newtonThreshold:
+            lcInverse = int(divisor.leadingCoefficient().inverse())
+            quotient, remainder = longDivision(a, b, lcInverse, 0, p)
+         else:
+            reversedQuotient = multiplyInts(field, a[::-1][:k], divisor.reciprocal(k))[:k]
+            quotient = [c % p for c in reversed(reversedQuotient)]
+            product = multiplyInts(field, quotient[:m], b[:m])
+            remainder = [x - y for (x, y) in zip(a[:m], product)]
 
-         return quotient, remainder
+         return Polynomial([field(c) for c in quotient]), Polynomial([field(c) for c in remainder])
 
 
       @typecheck
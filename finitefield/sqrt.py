@@ -0,0 +1,134 @@
+# Square roots modulo a prime p.
+#
+# Write p - 1 = 2^s t with t odd. For a square a, the classic Tonelli-Shanks
+# algorithm spends O(s^2) multiplications finding the discrete logarithm of
+# a^t in the subgroup of 2^s-th roots of unity, which is slow for fields like
+# the Jubjub base field where s = 32. Following Sarkar ("Computing square
+# roots faster than the Tonelli-Shanks/Bernstein algorithm", 2020) and
+# Pornin's table-based variant, that logarithm is found w bits at a time by
+# table lookups instead, for about s squarings plus a few multiplications per
+# window on top of the single exponentiation by (t-1)/2.
+
+
+# jacobiSymbol: int, int -> int
+# the Jacobi symbol (a/n) for odd n > 0 by quadratic reciprocity, which for a
+# prime n is the Legendre symbol: 1 for nonzero squares, -1 for non-squares
+# and 0 for multiples of n
+def jacobiSymbol(a, n):
+   if n <= 0 or n & 1 == 0:
+      raise ValueError("The Jacobi symbol needs an odd positive modulus, not %d" % n)
+
+   a %= n
+   result = 1
+   while a:
+      while a & 1 == 0:
+         a >>= 1
+         if n & 7 in (3, 5):
+            result = -result
+
+      a, n = n, a
+      if a & 3 == 3 and n & 3 == 3:
+         result = -result
+      a %= n
+
+   return result if n == 1 else 0
+
+
+# the precomputed constants for square roots modulo one prime p
+class SqrtTables(object):
+   def __init__(self, p, width=8):
+      self.p = p
+      self.s = s = ((p - 1) & -(p - 1)).bit_length() - 1
+      self.t = t = (p - 1) >> s
+
+      z = 2
+      while jacobiSymbol(z, p) != -1:
+         z += 1
+
+      self.z = z
+      self.g = pow(z, t, p) # a generator of the 2^s-th roots of unity
+      self.gInverse = pow(self.g, p - 2, p)
+
+      # the windows of the logarithm, least significant first, as
+      # (offset, width) pairs covering bits 0 to s-1
+      self.windows = [(offset, min(width, s - offset)) for offset in range(0, s, width)]
+
+      # for each window width v, the logarithms of the elements of order
+      # dividing 2^v, base g^(2^(s-v))
+      self.logs = {}
+      for (_, v) in self.windows:
+         if v not in self.logs:
+            h = pow(self.g, 1 << (s - v), p)
+            logs, power = {}, 1
+            for j in range(1 << v):
+               logs[power] = j
+               power = power * h % p
+            self.logs[v] = logs
+
+      self.width = width
+      self.powers = {}
+
+
+   # the table [g^(-j 2^m) for 0 <= j < 2^width], built on first use
+   def inversePowers(self, m):
+      if m not in self.powers:
+         base = pow(self.gInverse, 1 << m, self.p)
+         table, power = [], 1
+         for _ in range(1 << self.width):
+            table.append(power)
+            power = power * base % self.p
+         self.powers[m] = table
+
+      return self.powers[m]
+
+
+   # sqrt: int -> int or None
+   # a square root of 0 <= a < p, or None if a is not a square
+   def sqrt(self, a):
+      p, s = self.p, self.s
+      if a == 0:
+         return 0
+
+      u = pow(a, (self.t - 1) >> 1, p)
+      v = a * u % p  # a^((t+1)/2)
+      b = v * u % p  # a^t, a 2^s-th root of unity
+
+      # bPowers[i] = b^(2^(s - offset - width)) for the i-th window
+      bPowers = []
+      power, exponent = b, 0
+      for (offset, width) in reversed(self.windows):
+         while exponent < s - offset - width:
+            power = power * power % p
+            exponent += 1
+         bPowers.append(power)
+      bPowers.reverse()
+
+      # find the digits of e = log_g(b), a window at a time: removing the
+      # lower digits found so far leaves an element of order 2^width whose
+      # logarithm is the next digit
+      digits = []
+      for i, (offset, width) in enumerate(self.windows):
+         y = bPowers[i]
+         shift = s - offset - width
+         for (jOffset, _), digit in zip(self.windows, digits):
+            if digit:
+               y = y * self.inversePowers(jOffset + shift)[digit] % p
+
+         digit = self.logs[width].get(y)
+         if digit is None:
+            return None
+         digits.append(digit)
+
+      if digits[0] & 1:
+         return None # e is odd, so a is not a square
+
+      # sqrt(a) = v g^(-e/2)
+      x = v
+      for (offset, _), digit in zip(self.windows, digits):
+         if offset == 0:
+            if digit:
+               x = x * self.inversePowers(0)[digit >> 1] % p
+         elif digit:
+            x = x * self.inversePowers(offset - 1)[digit] % p
+
+      return x
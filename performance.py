@@ -2,7 +2,10 @@ from finitefield.finitefield import FiniteField
 from edwards import *
 from edwards_proj import *
 from edwards_ext import *
+import edwards, edwards_proj, edwards_ext
+from scalarmult import doubleAndAdd, FixedBaseTable
 
+import random
 import time
 
 # the order of jubjub base field
@@ -15,11 +18,15 @@ curve = TwistedEdwardsCurve(Fq(-1), dd)
 curve_proj = ProjectiveEdwards(Fq(-1), dd)
 curve_ext = ExtendedEdwards(Fq(-1), dd)
 
-curves = [curve, curve_proj, curve_ext]
+# the same curve over the slotted field elements without typecheck dispatch
+Ff = FiniteField(q, 1, backend='fast')
+curve_fast = ExtendedEdwards(Ff(-1), -(Ff(10240)/Ff(10241)))
 
+curves = [(curve, edwards.Point), (curve_proj, edwards_proj.Point), (curve_ext, edwards_ext.Point)]
 
 
-def test(curve):
+
+def test(curve, Point):
 	p = Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
 	q = Point(curve, Fq(0x1624451837683b2c4d2694173df71c9174ffcc613788eef3a9c7a7d0011476fa), Fq(0x6f76dbfd7c62860d59f5937fa66d0571158ff68f28ccd83a4cd41b9918ee8fe2))
 	t0 = time.time()
@@ -28,9 +35,446 @@ def test(curve):
 	t1 = time.time()
 	print curve, "time: ", t1 - t0
 
+
+# the affine addition chain with every intermediate result checked on the
+# curve again, as all points were before the 'debug' validation policy
+def testDebugValidation():
+	curve_debug = TwistedEdwardsCurve(Fq(-1), dd, validation='debug')
+	test(curve_debug, edwards.Point)
+	print "^ with validation='debug'"
+
+
+# the same addition chain, but carrying Z along and normalizing once at the end
+def testProjective(curve):
+	p = edwards_proj.Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
+	q = edwards_proj.Point(curve, Fq(0x1624451837683b2c4d2694173df71c9174ffcc613788eef3a9c7a7d0011476fa), Fq(0x6f76dbfd7c62860d59f5937fa66d0571158ff68f28ccd83a4cd41b9918ee8fe2))
+	t0 = time.time()
+	r = p.projective()
+	for i in range(50000):
+		r = r + q
+	p = r.affine()
+	t1 = time.time()
+	print curve, "(X:Y:Z) time: ", t1 - t0
+
+
+# the same addition chain in (X:Y:Z:T), which needs no inversion until the end
+def testExtended(curve, Fq=Fq):
+	p = edwards_ext.Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
+	q = edwards_ext.Point(curve, Fq(0x1624451837683b2c4d2694173df71c9174ffcc613788eef3a9c7a7d0011476fa), Fq(0x6f76dbfd7c62860d59f5937fa66d0571158ff68f28ccd83a4cd41b9918ee8fe2)).extended()
+	t0 = time.time()
+	r = p.extended()
+	for i in range(50000):
+		r = r + q
+	p = r.affine()
+	t1 = time.time()
+	print curve, Fq.englishName[:4], "(X:Y:Z:T) time: ", t1 - t0
+
+# per-multiply cost of each representation of the base field
+def testMultiply(field):
+	a = field(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1)
+	b = field(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1)
+	t0 = time.time()
+	for i in range(200000):
+		a = a * b
+	t1 = time.time()
+	print field.englishName[:25], "time per multiply: ", (t1 - t0) / 200000
+
+# one inversion per element against Montgomery's trick
+def testBatchInverse(field):
+	elements = [field(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1 * i) for i in range(1, 5001)]
+	t0 = time.time()
+	inverses = [x.inverse() for x in elements]
+	t1 = time.time()
+	inverses = field.batch_inverse(elements)
+	t2 = time.time()
+	print "5000 inversions: ", t1 - t0, "batch_inverse: ", t2 - t1
+
+# the inversion strategies of the prime fields, and exponentiation by a
+# precompiled addition chain against one compiled for every call
+def testInversion(field):
+	elements = [field(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1 * i) for i in range(1, 1001)]
+	for method in ('euclid', 'fermat', 'native'):
+		field.useInversion(method)
+		t0 = time.time()
+		inverses = [x.inverse() for x in elements]
+		t1 = time.time()
+		print field.englishName[:25], "1000 inversions,", method, ": ", t1 - t0
+	field.useInversion('euclid')
+	exponent = (field.p - 1) >> 32
+	chain = field.additionChain(exponent)
+	t0 = time.time()
+	powers = [x ** exponent for x in elements]
+	t1 = time.time()
+	powers = [chain(x) for x in elements]
+	t2 = time.time()
+	print field.englishName[:25], "1000 powers by (p-1)/2^32, __pow__: ", t1 - t0, "precompiled chain: ", t2 - t1
+
+# the generic divmod loop of the extended Euclidean algorithm against the
+# integer loop and the polynomial half-gcd it dispatches to
+def testGcd(field, degree):
+	from finitefield import euclidean
+	from finitefield.polynomial import polynomialsOver
+	elements = [0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1 * i % field.p for i in range(1, 5001)]
+	t0 = time.time()
+	results = [euclidean.euclideanExtended(x, field.p) for x in elements]
+	t1 = time.time()
+	results = [euclidean.extendedEuclideanAlgorithm(x, field.p) for x in elements]
+	t2 = time.time()
+	print "5000 255-bit gcds, generic: ", t1 - t0, "integer: ", t2 - t1
+	Polynomial = polynomialsOver(field)
+	coefficients = random.Random(1)
+	a = Polynomial([field(coefficients.randrange(field.p)) for _ in range(degree + 1)])
+	b = Polynomial([field(coefficients.randrange(field.p)) for _ in range(degree)])
+	t0 = time.time()
+	result = euclidean.euclideanExtended(a, b)
+	t1 = time.time()
+	result = euclidean.halfGcdExtended(a, b)
+	t2 = time.time()
+	print "degree %d polynomial gcd, generic: " % degree, t1 - t0, "half-gcd: ", t2 - t1
+
+# products of polynomials over the field, schoolbook on field elements (the
+# old __mul__) against the Karatsuba/NTT dispatch of Polynomial.__mul__
+def testPolynomialMultiply(field):
+	from finitefield.polynomial import polynomialsOver, schoolbook
+	Polynomial = polynomialsOver(field)
+	for n in (64, 512, 4096):
+		a = Polynomial([field(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1 * i) for i in range(1, n + 1)])
+		b = Polynomial([field(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1 * i) for i in range(1, n + 1)])
+		t0 = time.time()
+		if n <= 512:
+			product = schoolbook(a.coefficients, b.coefficients, field(0))
+		t1 = time.time()
+		product = a * b
+		t2 = time.time()
+		print "%d coefficient polynomial product, schoolbook: " % n, (t1 - t0 if n <= 512 else "skipped"), "Polynomial.__mul__: ", t2 - t1
+
+# building an evaluation domain, and evaluating on it point by point
+# against one FFT
+def testEvaluationDomain(field):
+	from finitefield.domain import EvaluationDomain
+	from finitefield.polynomial import polynomialsOver
+	Polynomial = polynomialsOver(field)
+	t0 = time.time()
+	domain = EvaluationDomain(field, 1 << 16)
+	t1 = time.time()
+	print "domain of size 2^16, building: ", t1 - t0
+	f = Polynomial([field(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1 * i) for i in range(1, 257)])
+	small = EvaluationDomain(field, 256)
+	t0 = time.time()
+	values = [sum((c * x ** i for i, c in enumerate(f)), field(0)) for x in small.elements()]
+	t1 = time.time()
+	values = small.evaluate(f)
+	t2 = time.time()
+	print "256 evaluations, one by one: ", t1 - t0, "fft: ", t2 - t1
+	values = [int(c) for c in f] * 256
+	t0 = time.time()
+	domain.fft(values)
+	domain.ifft(values)
+	t1 = time.time()
+	print "fft and ifft of size 2^16: ", t1 - t0
+
+# evaluating a polynomial at many points with field element operators
+# against evaluate_many, and interpolating through them again
+def testMultipointEvaluation(field, n):
+	from finitefield.polynomial import polynomialsOver
+	Polynomial = polynomialsOver(field)
+	f = Polynomial([field(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1 * i) for i in range(1, n + 1)])
+	xs = [field(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1 * i) for i in range(1, n + 1)]
+	t0 = time.time()
+	values = []
+	for x in xs:
+		value = field(0)
+		for c in reversed(f.coefficients):
+			value = value * x + c
+		values.append(value)
+	t1 = time.time()
+	values = f.evaluate_many(xs)
+	t2 = time.time()
+	g = Polynomial.interpolate(xs, values)
+	t3 = time.time()
+	print "%d points, element Horner: " % n, t1 - t0, "evaluate_many: ", t2 - t1, "interpolate: ", t3 - t2
+
+# polynomial division by long division and by the Newton reciprocal, which
+# the second division by the same divisor finds cached
+def testPolynomialDivision(field):
+	from finitefield.polynomial import polynomialsOver
+	Polynomial = polynomialsOver(field)
+	for n in (64, 1024):
+		a = Polynomial([field(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1 * i) for i in range(1, 2 * n + 1)])
+		b = Polynomial([field(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1 * i) for i in range(1, n + 2)])
+		t0 = time.time()
+		result = divmod(a, b)
+		t1 = time.time()
+		result = divmod(a, b)
+		t2 = time.time()
+		print "degree %d by degree %d division: " % (2 * n - 1, n), t1 - t0, "again: ", t2 - t1
+
+# quadratic and cubic extension fields with a binomial modulus, generic
+# Polynomial-based elements against the specialized classes
+def testExtensionField(p, m):
+	from finitefield.extension import findBinomialConstant
+	from finitefield.polynomial import polynomialsOver
+	Zp = FiniteField(p, 1)
+	modulus = polynomialsOver(Zp).factory([-findBinomialConstant(p, m)] + [0] * (m - 1) + [1])
+	for field in (FiniteField(p, m, modulus, backend='polynomial'), FiniteField(p, m)):
+		a = field([0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1 * (i + 1) for i in range(m)])
+		b = field([0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1 * (i + 1) for i in range(m)])
+		t0 = time.time()
+		for i in range(2000):
+			a = a * b
+		t1 = time.time()
+		for i in range(2000):
+			a = a * a
+		t2 = time.time()
+		for i in range(200):
+			a = a.inverse()
+		t3 = time.time()
+		print "F_{p^%d}" % m, field.__module__.split(".")[-1], "2000 multiplications: ", t1 - t0, "2000 squarings: ", t2 - t1, "200 inversions: ", t3 - t2
+
+# irreducibility tests of random polynomials of degree m over Z/p, and the
+# search for a sparse irreducible modulus
+def testIrreducibility(p, m):
+	from finitefield.finitefield import isIrreducible, generateIrreduciblePolynomial
+	from finitefield.polynomial import polynomialsOver
+	random.seed(m)
+	poly = polynomialsOver(FiniteField(p, 1)).factory
+	candidates = [poly([random.randint(0, p - 1) for _ in range(m)] + [1]) for _ in range(20)]
+	t0 = time.time()
+	for f in candidates:
+		isIrreducible(f, p)
+	t1 = time.time()
+	generateIrreduciblePolynomial(p, m, sparse=True)
+	t2 = time.time()
+	print "degree %d: 20 irreducibility tests: " % m, t1 - t0, "sparse modulus search: ", t2 - t1
+
+# cached field constructor lookups, with the counters of its registry
+def testConstructorCache(p):
+	t0 = time.time()
+	for i in range(10000):
+		FiniteField(p, 1)
+	t1 = time.time()
+	for i in range(10000):
+		FiniteField(p, m=1, backend=None)
+	t2 = time.time()
+	print "10000 FiniteField lookups: ", t1 - t0, "by keyword: ", t2 - t1, FiniteField.registry.info()
+
+# one inversion per point against a single shared inversion
+def testNormalize(curve):
+	p = edwards_ext.Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
+	points = [p.extended()]
+	for i in range(999):
+		points.append(points[-1] + p)
+	t0 = time.time()
+	affine = [r.affine() for r in points]
+	t1 = time.time()
+	affine = curve.normalize_batch(points)
+	t2 = time.time()
+	print curve, "1000 affine(): ", t1 - t0, "normalize_batch: ", t2 - t1
+
+# a 255-bit scalar multiplication by binary double-and-add and by wNAF
+def testScalarMul(curve, Point, convert):
+	p = Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
+	k = 0x6dd1b3e5a4bb5d1a9b5b8f6a9ce1c8ea3f0f5c04b2ee1f6ad6ed3d6f4c2e8b35
+	t0 = time.time()
+	r = doubleAndAdd(convert(p), p, k)
+	t1 = time.time()
+	print curve, "double-and-add: ", t1 - t0
+	for w in range(2, 7):
+		t0 = time.time()
+		r = p.multiply(k, w)
+		t1 = time.time()
+		print curve, "wNAF w=%d: " % w, t1 - t0
+
+# table * k for tables of increasing size against Point.__mul__
+def testFixedBase(curve):
+	p = edwards_ext.Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
+	scalars = [0x6dd1b3e5a4bb5d1a9b5b8f6a9ce1c8ea3f0f5c04b2ee1f6ad6ed3d6f4c2e8b35 * i % q for i in range(1, 21)]
+	t0 = time.time()
+	for k in scalars:
+		r = p * k
+	t1 = time.time()
+	print curve, "20 x Point.__mul__: ", t1 - t0
+	for w in range(2, 9, 2):
+		t0 = time.time()
+		table = FixedBaseTable(p.extended(), w)
+		t1 = time.time()
+		for k in scalars:
+			r = (table * k).affine()
+		t2 = time.time()
+		print curve, "w=%d, %d points, build: " % (w, len(table)), t1 - t0, "20 x table * k: ", t2 - t1
+
+# N separate multiplications and additions against one bucket-method sum
+def testMultiScalarMul(curve, n):
+	p = edwards_ext.Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
+	points = curve.normalize_batch([p.extended() * (i + 1) for i in range(n)])
+	scalars = [0x6dd1b3e5a4bb5d1a9b5b8f6a9ce1c8ea3f0f5c04b2ee1f6ad6ed3d6f4c2e8b35 * (i + 1) % q for i in range(n)]
+	t0 = time.time()
+	r = points[0].extended() * 0
+	for k, point in zip(scalars, points):
+		r = r + point.extended() * k
+	r = r.affine()
+	t1 = time.time()
+	r = curve.multi_scalar_mul(scalars, points)
+	t2 = time.time()
+	print curve, "N=%d separate: " % n, t1 - t0, "multi_scalar_mul: ", t2 - t1
+
+# a*P + b*Q as two ladders against one shared doubling chain
+def testDoubleScalarMul(curve, Point):
+	p = Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
+	q = Point(curve, Fq(0x1624451837683b2c4d2694173df71c9174ffcc613788eef3a9c7a7d0011476fa), Fq(0x6f76dbfd7c62860d59f5937fa66d0571158ff68f28ccd83a4cd41b9918ee8fe2))
+	a = 0x6dd1b3e5a4bb5d1a9b5b8f6a9ce1c8ea3f0f5c04b2ee1f6ad6ed3d6f4c2e8b35
+	b = 0x3c1f0e2d4b5a69788796a5b4c3d2e1f00f1e2d3c4b5a69788796a5b4c3d2e1f0
+	t0 = time.time()
+	r = a * p + b * q
+	t1 = time.time()
+	print curve, "a*P + b*Q: ", t1 - t0
+	for method in ('wnaf', 'jsf'):
+		t0 = time.time()
+		r = p.double_scalar_mul(a, q, b, method)
+		t1 = time.time()
+		print curve, "double_scalar_mul(%s): " % method, t1 - t0
+
+# textbook Tonelli-Shanks, as the baseline for the table-based square root
+def tonelliShanks(a, p):
+	s, t = 0, p - 1
+	while t % 2 == 0:
+		s, t = s + 1, t // 2
+	z = 2
+	while pow(z, (p - 1) // 2, p) != p - 1:
+		z += 1
+	m, c, x, b = s, pow(z, t, p), pow(a, (t + 1) // 2, p), pow(a, t, p)
+	while b != 1:
+		i, b2 = 0, b
+		while b2 != 1:
+			b2, i = b2 * b2 % p, i + 1
+		c2 = pow(c, 1 << (m - i - 1), p)
+		m, c, x, b = i, c2 * c2 % p, x * c2 % p, b * c2 * c2 % p
+	return x
+
+def testSqrt(field):
+	squares = [field(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1 * i) ** 2 for i in range(1, 201)]
+	field(4).sqrt() # build the tables
+	t0 = time.time()
+	roots = [tonelliShanks(int(a), field.p) for a in squares]
+	t1 = time.time()
+	roots = [a.sqrt() for a in squares]
+	t2 = time.time()
+	print "200 square roots, Tonelli-Shanks: ", t1 - t0, "sqrt(): ", t2 - t1
+	t0 = time.time()
+	symbols = [pow(int(a), (field.p - 1) // 2, field.p) for a in squares]
+	t1 = time.time()
+	symbols = [a.is_square() for a in squares]
+	t2 = time.time()
+	print "200 Euler criteria: ", t1 - t0, "is_square(): ", t2 - t1
+
+# decompressing points one at a time against a whole batch
+def testDecompress(curve):
+	p = edwards_ext.Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
+	r = p.extended()
+	points = []
+	for i in range(500):
+		points.append(r)
+		r = r + p
+	encodings = [curve.compress(point) for point in curve.normalize_batch(points)]
+	t0 = time.time()
+	points = [curve.decompress(encoding) for encoding in encodings]
+	t1 = time.time()
+	points = curve.decompress_batch(encodings)
+	t2 = time.time()
+	print curve, "500 x decompress: ", t1 - t0, "decompress_batch: ", t2 - t1
+
+# bulk encoding into one preallocated buffer and decoding back out of it
+def testSerialize(curve):
+	p = edwards_ext.Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
+	r = p.extended()
+	points = []
+	for i in range(2000):
+		points.append(r)
+		r = r + p
+	points = curve.normalize_batch(points)
+	for compressed in (False, True):
+		buf = bytearray(2000 * (32 if compressed else 64))
+		t0 = time.time()
+		curve.encode_into(points, buf, 0, compressed)
+		t1 = time.time()
+		decoded = curve.decode_from(buf, 0, None, compressed)
+		t2 = time.time()
+		print curve, "2000 points, compressed=%s, encode_into: " % compressed, t1 - t0, "decode_from: ", t2 - t1
+
+# element-wise addition of two columns of points against a loop over points
+def testPointBatch(curve):
+	from pointbatch import PointBatch
+	p = edwards_ext.Point(curve, Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1), Fq(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1))
+	r = p.extended()
+	points = []
+	for i in range(5000):
+		points.append(r)
+		r = r + p
+	others = points[1:] + points[:1]
+	t0 = time.time()
+	sums = [a + b for a, b in zip(points, others)]
+	t1 = time.time()
+	batch, otherBatch = PointBatch.fromPoints(curve, points), PointBatch.fromPoints(curve, others)
+	t2 = time.time()
+	sums = batch + otherBatch
+	t3 = time.time()
+	print curve, "5000 additions, ExtendedPoint loop: ", t1 - t0, "PointBatch: ", t3 - t2, "(building the batches: %f)" % (t2 - t1)
+
+# element-wise products of many elements, one at a time against a FqVector
+def testFqVector(field):
+	from finitefield.fqvector import vectorsOver
+	xs = [field(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1 * i) for i in range(1, 50001)]
+	ys = [field(0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1 * i) for i in range(1, 50001)]
+	t0 = time.time()
+	products = [x * y for x, y in zip(xs, ys)]
+	t1 = time.time()
+	FqVector = vectorsOver(field)
+	a, b = FqVector.fromElements(xs), FqVector.fromElements(ys)
+	t2 = time.time()
+	products = a * b
+	t3 = time.time()
+	print "50000 multiplications, element loop: ", t1 - t0, "FqVector: ", t3 - t2, "(conversion: %f)" % (t2 - t1)
+
+print "="*25
+testScalarMul(curve, edwards.Point, lambda p: p)
+testScalarMul(curve_proj, edwards_proj.Point, lambda p: p.projective())
+testScalarMul(curve_ext, edwards_ext.Point, lambda p: p.extended())
+testFixedBase(curve_ext)
+for c, point in curves:
+	testDoubleScalarMul(c, point)
+for n in (10, 100, 1000):
+	testMultiScalarMul(curve_ext, n)
+
+print "="*25
+testMultiply(Fq)
+testMultiply(FiniteField(q, 1, backend='montgomery'))
+testMultiply(Ff)
+testBatchInverse(Fq)
+testInversion(Fq)
+testInversion(FiniteField(q, 1, backend='montgomery'))
+testGcd(Fq, 300)
+testPolynomialMultiply(Fq)
+testEvaluationDomain(Fq)
+testMultipointEvaluation(Fq, 512)
+testPolynomialDivision(Fq)
+testExtensionField(0x1a0111ea397fe69a4b1ba7b6434bacd764774b84f38512bf6730d2a0f6b0f6241eabfffeb153ffffb9feffffffffaaab, 2)
+testExtensionField(q, 3)
+testIrreducibility(q, 8)
+testConstructorCache(q)
+testSqrt(Fq)
+testNormalize(curve_ext)
+testDecompress(curve_ext)
+testSerialize(curve_ext)
+testPointBatch(curve_ext)
+testFqVector(Fq)
+
 for j in range(10):
 	print "="*25
-	for i in curves:
-		test(i)
+	for i, point in curves:
+		test(i, point)
+	testDebugValidation()
+	testProjective(curve_proj)
+	testExtended(curve_ext)
+	testExtended(curve_fast, Ff)
 
 
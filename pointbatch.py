@@ -0,0 +1,124 @@
+# Columnar storage for many points of an ExtendedEdwards curve at once.
+#
+# A PointBatch keeps the X, Y, Z and T coordinates of n points in four NumPy
+# object arrays of plain Python ints reduced mod p, instead of n ExtendedPoint
+# objects with four field elements each. The a=-1 extended formulas of
+# edwards_ext.py are then applied to whole columns, so the interpreter loop
+# over points and the per-operation element objects are replaced by NumPy's
+# element-wise loops over the ints.
+#
+# This module needs NumPy, which the rest of the package does not.
+
+import numpy
+
+from edwards_ext import Point, ExtendedPoint, Ideal
+
+
+def column(values):
+   array = numpy.empty(len(values), dtype=object)
+   array[:] = [int(v) for v in values]
+   return array
+
+
+class PointBatch(object):
+   def __init__(self, curve, x, y, z, t):
+      self.curve = curve
+      self.p = curve.d.field.p
+      self.x, self.y, self.z, self.t = x, y, z, t
+
+
+   # fromPoints: ExtendedEdwards, [Point or ExtendedPoint] -> PointBatch
+   @classmethod
+   def fromPoints(cls, curve, points):
+      points = [P if isinstance(P, ExtendedPoint) else P.extended() for P in points]
+      return cls(curve, column([P.x for P in points]), column([P.y for P in points]),
+                 column([P.z for P in points]), column([P.t for P in points]))
+
+
+   # the batch of n copies of the identity (0:1:1:0)
+   @classmethod
+   def identity(cls, curve, n):
+      zeros, ones = column([0] * n), column([1] * n)
+      return cls(curve, zeros, ones, ones.copy(), zeros.copy())
+
+
+   def __len__(self):
+      return len(self.x)
+
+
+   def __getitem__(self, i):
+      field = self.curve.d.field
+      return ExtendedPoint(self.curve, field(self.x[i]), field(self.y[i]), field(self.t[i]), field(self.z[i]))
+
+
+   # affine: -> [Point]
+   # normalize every point, sharing one inversion between all of them
+   def affine(self):
+      field = self.curve.d.field
+      zInverses = field.batch_inverse([field(z) for z in self.z])
+      return [Point(self.curve, field(x) * zInv, field(y) * zInv, True)
+                 for (x, y, zInv) in zip(self.x, self.y, zInverses)]
+
+
+   def __neg__(self):
+      p = self.p
+      return PointBatch(self.curve, (p - self.x) % p, self.y, self.z, (p - self.t) % p)
+
+
+   # element-wise addition (add-2008-hwcd-3, see ExtendedPoint.__add__) with
+   # another batch of the same length, or with one point added to every
+   # point of this batch
+   def __add__(self, other):
+      if isinstance(other, Ideal):
+         return self
+      if isinstance(other, Point):
+         other = other.extended()
+      if isinstance(other, ExtendedPoint):
+         x2, y2, z2, t2 = int(other.x), int(other.y), int(other.z), int(other.t)
+      elif isinstance(other, PointBatch):
+         if len(other) != len(self):
+            raise ValueError("Can't add batches of %d and %d points" % (len(self), len(other)))
+         x2, y2, z2, t2 = other.x, other.y, other.z, other.t
+      else:
+         return NotImplemented
+
+      if self.curve != other.curve:
+         raise Exception("Can't add points on different curves!")
+
+      p, d = self.p, int(self.curve.d)
+      x1, y1, z1, t1 = self.x, self.y, self.z, self.t
+
+      a = (y1 - x1) * (y2 - x2) % p
+      b = (y1 + x1) * (y2 + x2) % p
+      c = 2 * d * t1 % p * t2 % p
+      dd = 2 * z1 * z2 % p
+      e = b - a
+      f = dd - c
+      g = dd + c
+      h = b + a
+
+      return PointBatch(self.curve, e * f % p, g * h % p, f * g % p, e * h % p)
+
+
+   def __radd__(self, other):
+      return self + other
+
+
+   def __sub__(self, other):
+      return self + -other
+
+
+   # element-wise doubling (dbl-2008-hwcd, see ExtendedPoint.double)
+   def double(self):
+      p = self.p
+      x1, y1, z1 = self.x, self.y, self.z
+
+      a = x1 * x1 % p
+      b = y1 * y1 % p
+      c = 2 * z1 * z1 % p
+      e = ((x1 + y1) * (x1 + y1) - a - b) % p
+      g = b - a
+      f = g - c
+      h = -a - b
+
+      return PointBatch(self.curve, e * f % p, g * h % p, f * g % p, e * h % p)
@@ -0,0 +1,313 @@
+# Scalar multiplication algorithms shared by the point classes in edwards.py,
+# edwards_proj.py and edwards_ext.py. They only use +, - (negation) and
+# double() on the points they are given, so they run in whichever coordinate
+# system those points are in.
+
+from finitefield.numbertype import integerTypes
+
+
+# wnaf: int, int -> [int]
+# the width-w non-adjacent form of n >= 0, least significant digit first.
+# Every nonzero digit is odd and less than 2^(w-1) in absolute value, and of
+# any w consecutive digits at most one is nonzero.
+def wnaf(n, width):
+   if width < 2:
+      raise ValueError("The wNAF window width must be at least 2, not %d" % width)
+
+   window = 1 << width
+   digits = []
+
+   while n > 0:
+      if n & 1:
+         digit = n & (window - 1)
+         if digit >= window >> 1:
+            digit -= window
+         n -= digit
+      else:
+         digit = 0
+
+      digits.append(digit)
+      n >>= 1
+
+   return digits
+
+
+# oddMultiples: Point, int -> [Point]
+# the table [P, 3P, 5P, ..., (2^(w-1) - 1)P] used by the wNAF digits
+def oddMultiples(P, width):
+   table = [P]
+   if width > 2:
+      twoP = P.double()
+      for _ in range((1 << (width - 2)) - 1):
+         table.append(table[-1] + twoP)
+
+   return table
+
+
+# wnafMultiply: Point, int, int -> Point
+# compute nP for n >= 1 from the width-w NAF of n: one doubling per digit and
+# one addition per nonzero digit (about 1 in w+1 of them), where the negative
+# digits use the negated table entries
+def wnafMultiply(P, n, width=4):
+   table = oddMultiples(P, width)
+   R = None
+
+   for digit in reversed(wnaf(n, width)):
+      if R is not None:
+         R = R.double()
+
+      if digit > 0:
+         T = table[digit >> 1]
+      elif digit < 0:
+         T = -table[-digit >> 1]
+      else:
+         continue
+
+      R = T if R is None else R + T
+
+   return R
+
+
+# doubleAndAdd: Point, Point, int -> Point
+# left-to-right binary double-and-add: R is the point for the top bit of n,
+# and addend (which may be in a cheaper representation, e.g. affine) is
+# added in for every further set bit
+def doubleAndAdd(R, addend, n):
+   for i in range(n.bit_length() - 2, -1, -1):
+      R = R.double()
+
+      if (n >> i) & 1:
+         R = R + addend
+
+   return R
+
+
+# A fixed-base table for multiplying one point by many different scalars.
+# The scalar is cut into signed base-2^w digits d_i with |d_i| <= 2^(w-1), and
+# for every digit position i the table holds j 2^(wi) P for 1 <= j <= 2^(w-1).
+# Then kP is a sum of one (possibly negated) table entry per nonzero digit, so
+# table * k costs about bits/w additions and no doublings at all, in exchange
+# for (bits/w + 1) 2^(w-1) stored points.
+#
+# Entries are kept in the coordinates of the point the table is built from,
+# so build it from an ExtendedPoint (or ProjectivePoint) for inversion-free
+# additions, and normalize the results when they are needed in affine form.
+class FixedBaseTable(object):
+   def __init__(self, P, width=4, bits=256):
+      if width < 1:
+         raise ValueError("The window width must be at least 1, not %d" % width)
+
+      self.base = P
+      self.width = width
+      self.bits = bits
+      self.rows = []
+
+      half = 1 << (width - 1)
+      B = P
+      for i in range((bits + width - 1) // width + 1):
+         row = [B]
+         for _ in range(half - 1):
+            row.append(row[-1] + B)
+         self.rows.append(row)
+
+         for _ in range(width):
+            B = B.double()
+
+
+   def __len__(self):
+      return sum(len(row) for row in self.rows)
+
+
+   # the signed base-2^w digits of 0 <= k < 2^bits, least significant first
+   def digits(self, k):
+      window = 1 << self.width
+      half = window >> 1
+      digits = []
+
+      while k > 0:
+         digit = k & (window - 1)
+         if digit > half:
+            digit -= window
+         digits.append(digit)
+         k = (k - digit) >> self.width
+
+      return digits
+
+
+   def __mul__(self, k):
+      if not isinstance(k, integerTypes):
+         raise Exception("Can't scale a point by something which isn't an int!")
+
+      if k < 0:
+         return -(self * -k)
+      if k == 0:
+         return self.base * 0
+      if k.bit_length() > self.bits:
+         raise ValueError("The scalar has more than the %d bits this table covers" % self.bits)
+
+      R = None
+      for row, digit in zip(self.rows, self.digits(k)):
+         if digit > 0:
+            T = row[digit - 1]
+         elif digit < 0:
+            T = -row[-digit - 1]
+         else:
+            continue
+
+         R = T if R is None else R + T
+
+      return R
+
+
+   def __rmul__(self, k):
+      return self * k
+
+
+# pippengerWindow: int, int -> int
+# the bucket width c minimizing the number of additions and doublings of the
+# bucket method for n terms of the given bit length:
+# ceil(bits/c) windows of (n + 2^(c+1)) additions, plus bits doublings
+def pippengerWindow(n, bits):
+   cost = lambda c: ((bits + c - 1) // c) * (n + (2 << c)) + bits
+   return min(range(1, 21), key=cost)
+
+
+# multi_scalar_mul: [int], [Point] -> Point
+# compute sum(k_i P_i) with Pippenger's bucket method. The scalars are cut
+# into c-bit windows; in each window every point is added into the bucket of
+# its digit, and the buckets are combined with two running sums, so a window
+# costs about n + 2^(c+1) additions however large the digits are. With the
+# automatically chosen c the total grows like n bits / log(n) rather than the
+# n bits of separate multiplications.
+def multi_scalar_mul(scalars, points, width=None):
+   scalars, points = list(scalars), list(points)
+   if len(scalars) != len(points):
+      raise ValueError("Got %d scalars but %d points" % (len(scalars), len(points)))
+   if not points:
+      raise ValueError("Can't compute an empty multi-scalar multiplication")
+
+   terms = []
+   for k, P in zip(scalars, points):
+      if not isinstance(k, integerTypes):
+         raise Exception("Can't scale a point by something which isn't an int!")
+      if k < 0:
+         k, P = -k, -P
+      if k > 0:
+         terms.append((k, P))
+
+   if not terms:
+      return points[0] * 0
+
+   bits = max(k.bit_length() for k, _ in terms)
+   c = width or pippengerWindow(len(terms), bits)
+   mask = (1 << c) - 1
+
+   R = None
+   for shift in range(((bits + c - 1) // c - 1) * c, -1, -c):
+      if R is not None:
+         for _ in range(c):
+            R = R.double()
+
+      buckets = [None] * (mask + 1)
+      for k, P in terms:
+         digit = (k >> shift) & mask
+         if digit:
+            buckets[digit] = P if buckets[digit] is None else buckets[digit] + P
+
+      # sum(d buckets[d]) as the sum over d of the running sums from the top
+      running = windowSum = None
+      for digit in range(mask, 0, -1):
+         if buckets[digit] is not None:
+            running = buckets[digit] if running is None else running + buckets[digit]
+         if running is not None:
+            windowSum = running if windowSum is None else windowSum + running
+
+      if windowSum is not None:
+         R = windowSum if R is None else R + windowSum
+
+   return R
+
+
+# jsf: int, int -> [(int, int)]
+# the joint sparse form of a, b >= 0 (Solinas 2001; Algorithm 3.50 of the
+# Guide to Elliptic Curve Cryptography), least significant digit pair first.
+# The digits are in {-1, 0, 1} and on average only half of the pairs are
+# nonzero, against three quarters for the plain binary expansions.
+def jsf(a, b):
+   digits = []
+   d0 = d1 = 0
+
+   while a + d0 > 0 or b + d1 > 0:
+      l0, l1 = a + d0, b + d1
+
+      u0 = 0
+      if l0 & 1:
+         u0 = 1 if l0 & 3 == 1 else -1
+         if l0 & 7 in (3, 5) and l1 & 3 == 2:
+            u0 = -u0
+
+      u1 = 0
+      if l1 & 1:
+         u1 = 1 if l1 & 3 == 1 else -1
+         if l1 & 7 in (3, 5) and l0 & 3 == 2:
+            u1 = -u1
+
+      if 2 * d0 == 1 + u0:
+         d0 = 1 - d0
+      if 2 * d1 == 1 + u1:
+         d1 = 1 - d1
+
+      digits.append((u0, u1))
+      a, b = a >> 1, b >> 1
+
+   return digits
+
+
+# double_scalar_mul: Point, int, Point, int -> Point
+# compute aP + bQ with a single shared doubling chain (Straus/Shamir). With
+# method='wnaf' both scalars are recoded in width-w NAF and their odd
+# multiples tables interleaved; with method='jsf' the joint sparse form is
+# used with the four points P, Q, P+Q, P-Q.
+def double_scalar_mul(P, a, Q, b, method='wnaf', width=4):
+   if not isinstance(a, integerTypes) or not isinstance(b, integerTypes):
+      raise Exception("Can't scale a point by something which isn't an int!")
+   if method not in ('wnaf', 'jsf'):
+      raise ValueError("Unknown double scalar multiplication method %r" % method)
+
+   if a < 0:
+      a, P = -a, -P
+   if b < 0:
+      b, Q = -b, -Q
+
+   if a == 0 and b == 0:
+      return P * 0
+   if a == 0:
+      return wnafMultiply(Q, b, width)
+   if b == 0:
+      return wnafMultiply(P, a, width)
+
+   if method == 'jsf':
+      table = {(1, 0): P, (0, 1): Q, (1, 1): P + Q, (1, -1): P - Q}
+      for (u0, u1), T in list(table.items()):
+         table[(-u0, -u1)] = -T
+      steps = [[table[pair]] if pair != (0, 0) else [] for pair in jsf(a, b)]
+   else:
+      tables = (oddMultiples(P, width), oddMultiples(Q, width))
+      digits = (wnaf(a, width), wnaf(b, width))
+      steps = [[] for _ in range(max(len(digits[0]), len(digits[1])))]
+      for table, scalarDigits in zip(tables, digits):
+         for i, digit in enumerate(scalarDigits):
+            if digit > 0:
+               steps[i].append(table[digit >> 1])
+            elif digit < 0:
+               steps[i].append(-table[-digit >> 1])
+
+   R = None
+   for additions in reversed(steps):
+      if R is not None:
+         R = R.double()
+
+      for T in additions:
+         R = T if R is None else R + T
+
+   return R
@@ -82,3 +82,268 @@ print 3 * p25 + 6 * p25
 print 9 * p25
 print 3 * p35 + 6 * p35
 print 9 * p35
+
+
+print "=" * 30
+import edwards_proj
+p27 = edwards_proj.Point(curve2, 5, 6846412461894745224441235558443359243034138132682534265960483512729196124138)
+p28 = edwards_proj.Point(curve2, 20, 19591689915777126424527574975649725331665833659101192930707046924393354292087)
+print p27 * 6
+print (p27.projective() * 6).affine()
+print (p27.projective() + p28).affine()
+print p27.projective().double() + p28.projective() == p27 * 2 + p28
+
+
+print "=" * 30
+import edwards_ext
+p37 = edwards_ext.Point(curve3, 5, 6846412461894745224441235558443359243034138132682534265960483512729196124138)
+p38 = edwards_ext.Point(curve3, 20, 19591689915777126424527574975649725331665833659101192930707046924393354292087)
+print p37 * 6
+print (p37.extended() * 6).affine()
+print (p37.extended() + p38).affine()
+print p37.extended().double() + p38.extended() == p37 * 2 + p38
+
+
+print "=" * 30
+print curve2.normalize_batch([p27.projective() * 6, p27.projective() + p28]) == [p27 * 6, p27 + p28]
+print curve3.normalize_batch([p37.extended() * 6, p37.extended() + p38]) == [p37 * 6, p37 + p38]
+
+
+print "=" * 30
+print curve3.decompress(curve3.compress(p37)) == p37
+print curve3.decompress_batch([curve3.compress(p37), curve3.compress(p38)]) == [p37, p38]
+n37 = -edwards_ext.Point(curve3, 10, 9069365299349881324022309154395348339753339814197599672892180073931980134853)
+print curve3.decompress(curve3.compress(n37)) == n37
+buf = bytearray(160)
+end = curve3.encode_into([n37, p38], buf)
+print curve3.encode_into([n37], buf, end, compressed=True) == 160
+print curve3.decode_from(buf, count=2) == [n37, p38], curve3.decode_from(buf, end, compressed=True) == [n37]
+
+
+print "=" * 30
+print curve2.multi_scalar_mul([3, 5, 7], [p27, edwards_proj.Ideal(curve2), p28]) == p27 * 3 + p28 * 7
+print curve3.multi_scalar_mul([3, 5, 7], [p37, edwards_ext.Ideal(curve3), p38]) == p37 * 3 + p38 * 7
+print curve3.multi_scalar_mul([5], [edwards_ext.Ideal(curve3)]) == edwards_ext.Ideal(curve3)
+
+
+print "=" * 30
+from finitefield.modp import IntegersModP
+from finitefield.numbertype import memoize
+from finitefield.finitefield import isIrreducible
+from finitefield.polynomial import polynomialsOver
+F7 = IntegersModP(7)
+for m in range(1000, 1300):
+	IntegersModP(m)
+print IntegersModP(7) is F7, isIrreducible(polynomialsOver(F7).factory([1, 0, 1]), 7)
+print FiniteField(q, 1) is Fq, FiniteField(q, m=1, backend=None) is Fq, FiniteField(p=q, m=1) is Fq
+
+@memoize(maxsize=2)
+def pair(a, b=0):
+	return [a, b]
+first = pair(1)
+print pair(1, 0) is first, pair(a=1, b=0) is first, pair(2) is not first, pair(3) is not first, pair(1) is not first
+print sorted(pair.registry.info().items())
+
+
+print "=" * 30
+from finitefield.domain import EvaluationDomain
+domain = EvaluationDomain(Fq, 16)
+print EvaluationDomain(Fq, 16, domain.twiddles).inverseTwiddles == domain.inverseTwiddles
+try:
+	EvaluationDomain(Fq, 16, domain.twiddles[:-1])
+	print False
+except ValueError:
+	print True
+
+
+print "=" * 30
+from finitefield.sqrt import jacobiSymbol
+squares = [Fq(x).sqrt() ** 2 == Fq(x) for x in range(2, 60) if Fq(x).is_square()]
+print len(squares) > 0 and all(squares)
+print all(jacobiSymbol(x, q) == (1 if pow(x, (q - 1) // 2, q) == 1 else -1) for x in range(1, 60))
+print all(jacobiSymbol(x, 1009) == {0: 0, 1: 1, 1008: -1}[pow(x, 504, 1009)] for x in range(0, 3000, 7))
+
+
+print "=" * 30
+# FqVector needs NumPy, which the rest of the package doesn't
+try:
+	from finitefield.fqvector import vectorsOver
+except ImportError:
+	vectorsOver = None
+
+if vectorsOver is not None:
+	FqVector = vectorsOver(Fq)
+	values = [0, 1, 2, q - 1, 0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1, 2 ** 254 + 12345]
+	others = [q - 3, 7, 0, 5, 0x255fa75b6ef4d4e1349876df94ca8c9c3ec97778f89c0c3b2e4ccf25fdf9f7c1, 3 ** 150]
+	u, v = FqVector.fromInts(values), FqVector.fromInts(others)
+	print u.toInts() == [x % q for x in values]
+	print (u * v).toElements() == [Fq(x) * Fq(y) for (x, y) in zip(values, others)]
+	print (u + v).toElements() == [Fq(x) + Fq(y) for (x, y) in zip(values, others)], (u - v).toElements() == [Fq(x) - Fq(y) for (x, y) in zip(values, others)]
+	print (u * Fq(5)).toElements() == [Fq(x) * 5 for x in values]
+
+
+print "=" * 30
+# PointBatch needs NumPy as well
+try:
+	from pointbatch import PointBatch
+except ImportError:
+	PointBatch = None
+if PointBatch is not None:
+	O = edwards_ext.Point(curve3, 0, 1)
+	points = [p37, p38, -p37, O, p37 * 3]
+	others = [p38, p38, p37, p37 * 5, O]
+	extended = [P.extended() for P in points]
+	B, C = PointBatch.fromPoints(curve3, points), PointBatch.fromPoints(curve3, others)
+	print len(B) == 5, [B[i] for i in range(5)] == extended, B.affine() == points
+	print [(B + C)[i] for i in range(5)] == [P + Q.extended() for (P, Q) in zip(extended, others)]
+	print [(B - C)[i] for i in range(5)] == [P - Q.extended() for (P, Q) in zip(extended, others)]
+	print (B + p38).affine() == [P + p38 for P in points], (p38.extended() + B).affine() == (p38 + B).affine() == [P + p38 for P in points]
+	print (B + edwards_ext.Ideal(curve3)) is B, (B + PointBatch.identity(curve3, 5)).affine() == points
+	print [B.double()[i] for i in range(5)] == [P.double() for P in extended], (-B).affine() == [-P for P in points]
+	print PointBatch.identity(curve3, 3).affine() == [O] * 3
+	try:
+		B + PointBatch.identity(curve3, 4)
+		print False
+	except ValueError:
+		print True
+
+
+print "=" * 30
+import random
+from finitefield.euclidean import lehmerExtended, halfGcdExtended, euclideanExtended
+random.seed(18)
+pairs = [(random.getrandbits(3000), random.getrandbits(2500)) for _ in range(3)] + [(random.getrandbits(255), q), (0, 5), (12, 0)]
+pairs.append((pairs[0][0] * 1234567, pairs[0][1] * 1234567))
+print all(x * a + y * b == d == euclideanExtended(a, b)[2] for (a, b) in pairs for (x, y, d) in [lehmerExtended(a, b)])
+F101 = polynomialsOver(IntegersModP(101)).factory
+common = F101([random.randint(0, 100) for _ in range(6)] + [1])
+for (m, n) in ((40, 33), (25, 25), (30, 0)):
+	a = F101([random.randint(0, 100) for _ in range(m)] + [1]) * common
+	b = F101([random.randint(0, 100) for _ in range(n)] + [1]) * common
+	x, y, d = halfGcdExtended(a, b)
+	print x * a + y * b == d, d.degree() == euclideanExtended(a, b)[2].degree(), (a % d).isZero() and (b % d).isZero()
+
+
+print "=" * 30
+from finitefield.polynomial import schoolbook, karatsuba
+from finitefield.ntt import nttMultiply
+random.seed(19)
+for (m, n) in ((100, 100), (150, 40), (33, 97), (300, 280)):
+	a = [random.randint(0, q - 1) for _ in range(m)]
+	b = [random.randint(0, q - 1) for _ in range(n)]
+	expected = [c % q for c in schoolbook(a, b, 0)]
+	print [c % q for c in karatsuba(a, b, 0)] == expected, nttMultiply(Fq, a, b) == expected
+a = polynomialsOver(Fq).factory([random.randint(0, q - 1) for _ in range(300)])
+print [int(c) for c in a * a] == [c % q for c in schoolbook([int(c) for c in a], [int(c) for c in a], 0)]
+
+
+print "=" * 30
+random.seed(21)
+FqPoly = polynomialsOver(Fq)
+f = FqPoly.factory([random.randint(0, q - 1) for _ in range(300)])
+xs = [Fq(random.randint(0, q - 1)) for _ in range(300)]
+values = f.evaluate_many(xs)
+print values == [f(x) for x in xs], FqPoly.interpolate(xs, values) == f
+print FqPoly.interpolate(xs[:5], values[:5]).evaluate_many(xs[:5]) == values[:5]
+
+
+print "=" * 30
+random.seed(22)
+for (m, n) in ((700, 300), (600, 500), (40, 20)):
+	a = FqPoly.factory([random.randint(0, q - 1) for _ in range(m)])
+	b = FqPoly.factory([random.randint(0, q - 1) for _ in range(n)])
+	quotient, remainder = divmod(a, b)
+	print quotient * b + remainder == a, remainder.degree() < b.degree()
+
+
+print "=" * 30
+for (p, m) in ((0x1a0111ea397fe69a4b1ba7b6434bacd764774b84f38512bf6730d2a0f6b0f6241eabfffeb153ffffb9feffffffffaaab, 2), (q, 3), (1009, 2), (1009, 3)):
+	F = FiniteField(p, m)
+	G = FiniteField(p, m, polynomialModulus=F.idealGenerator, backend='polynomial')
+	xs = [[random.randint(0, p - 1) for _ in range(m)] for _ in range(3)]
+	a, b, c = [F(x) for x in xs]
+	ga, gb, gc = [G(x) for x in xs]
+	same = lambda x, y: x.poly == y.poly
+	print F is not G, same(a * b, ga * gb), same(a * a, ga * ga), same(a + b - c, ga + gb - gc), same(a.inverse(), ga.inverse()), same(a ** p, a.frobenius()) and a.frobenius().poly == ga.poly.powmod(p, G.idealGenerator)
+
+
+print "=" * 30
+import itertools
+from finitefield.finitefield import generateIrreduciblePolynomial
+
+# f of degree m is reducible exactly when a monic factor of degree <= m/2 divides it
+def bruteIrreducible(f, p):
+	poly = polynomialsOver(IntegersModP(p)).factory
+	for k in range(1, f.degree() // 2 + 1):
+		for c in itertools.product(range(p), repeat=k):
+			if (f % poly(list(c) + [1])).isZero():
+				return False
+	return True
+
+for (p, m) in ((2, 6), (3, 4), (5, 3), (7, 2)):
+	poly = polynomialsOver(IntegersModP(p)).factory
+	candidates = [poly(list(c) + [1]) for c in itertools.product(range(p), repeat=m)]
+	print all(isIrreducible(f, p) == bruteIrreducible(f, p) for f in candidates)
+print all(bruteIrreducible(generateIrreduciblePolynomial(p, m, sparse=True), p) for (p, m) in ((2, 8), (3, 5), (5, 4)))
+
+
+print "=" * 30
+for c in (curve, curve2, curve3):
+	try:
+		c.multi_scalar_mul([5], [])
+		print False
+	except ValueError:
+		print True
+import edwards
+print curve.multi_scalar_mul([3, 5, 7], [p2, edwards.Ideal(curve), p4]) == p2 * 3 + p4 * 7
+
+
+print "=" * 30
+for (c, P, Q, I) in ((curve2, p27, p28, edwards_proj.Ideal(curve2)), (curve3, p37, p38, edwards_ext.Ideal(curve3))):
+	mixed = [c.lift(P) * 3, I, Q, c.lift(Q) + c.lift(P)]
+	expected = [P * 3, c.Point(c, 0, 1), Q, P + Q]
+	buf = bytearray(96 * len(mixed))
+	end = c.encode_into(mixed, buf)
+	c.encode_into(mixed, buf, end, compressed=True)
+	print c.decode_from(buf, count=len(mixed)) == expected, c.decode_from(buf, end, compressed=True) == expected
+	print c.decompress(c.compress(I)) == c.Point(c, 0, 1), c.decompress(c.compress(c.lift(P) * 3)) == P * 3
+
+
+print "=" * 30
+print p37 * 6 == p37.extended() * 6, p37.extended() * 6 == p37 * 6, p37 * 6 != p37.extended() * 5
+print p27 * 6 == p27.projective() * 6, p27.projective() * 6 == p27 * 6, p27 * 6 != p27.projective() * 5
+print (p37 == None) is False, p37 != "a point"
+
+
+print "=" * 30
+from finitefield.euclidean import gcd, extendedEuclideanAlgorithm
+F = FiniteField(0x1a0111ea397fe69a4b1ba7b6434bacd764774b84f38512bf6730d2a0f6b0f6241eabfffeb153ffffb9feffffffffaaab, 2)
+a, b = F([3, 4]), F([5, 7])
+x, y, d = extendedEuclideanAlgorithm(a, b)
+print x * a + y * b == d, gcd(a, b) == d
+
+
+print "=" * 30
+import os, tempfile, json
+import finitefield.finitefield
+from finitefield.finitefield import irreducibleModulus
+path = os.path.join(tempfile.mkdtemp(), 'moduli.json')
+with open(path, 'w') as f:
+	json.dump({'13,4': [0, 0, 0, 0, 1]}, f)
+finitefield.finitefield.moduliPath, finitefield.finitefield.moduli = path, None
+modulus = irreducibleModulus(13, 4)
+with open(path) as f:
+	recorded = json.load(f)['13,4']
+print isIrreducible(modulus, 13), recorded == [int(c) for c in modulus], recorded != [0, 0, 0, 0, 1]
+finitefield.finitefield.moduli = None
+print irreducibleModulus(13, 4) == modulus
+finitefield.finitefield.moduliPath, finitefield.finitefield.moduli = None, None
+
+
+print "=" * 30
+from finitefield.numbertype import additionChain
+e = (q - 1) // 3
+x = Fq(0x18ea85ca00cb9d895cb7b8669baa263fd270848f90ebefabe95b38300e80bde1)
+print x ** e == Fq(pow(int(x), e, q)), additionChain(e) is additionChain(e)
+hits = additionChain.registry.hits
+print x ** e * x ** e == Fq(pow(int(x), 2 * e, q)), additionChain.registry.hits == hits + 2